@@ -1,5 +1,5 @@
 # backend/app/core/config.py
-from typing import List
+from typing import Dict, List
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import field_validator
 
@@ -21,6 +21,103 @@ class Settings(BaseSettings):
     # (선택) 기본 임계치
     YOLO_DEFAULT_CONF: float = 0.25
 
+    # 추론 엔진: "ultralytics"(.pt, PyTorch) | "onnx"(ONNX Runtime CPU)
+    YOLO_ENGINE: str = "ultralytics"
+    YOLO_IMGSZ: int = 640
+    ONNX_CACHE_DIR: str = "weights/onnx"   # .pt → .onnx export 캐시 위치
+    # 모델별 정밀도: "fp32" | "int8" (int8은 scripts/quantize_int8.py로 만든 ONNX 사용)
+    YOLO_FIRE_SMOKE_PRECISION: str = "fp32"
+    YOLO_PPE_PRECISION: str = "fp32"
+
+    # 추론 워커 풀 (이벤트 루프 밖에서 YOLO 실행)
+    INFER_EXECUTOR: str = "thread"      # "thread" | "process"
+    INFER_WORKERS: int = 0              # 0이면 CPU 코어 수 기준 자동
+    INFER_INTRA_OP_THREADS: int = 0     # 워커당 torch 스레드 수 (0 = 코어/워커)
+    INFER_MAX_QUEUE: int = 64           # 대기+실행 중 최대 요청 수 (초과 시 503)
+    INFER_TIMEOUT_SEC: float = 10.0     # 요청당 타임아웃
+
+    # both 모드에서 fire/ppe 모델을 각자 전용 스레드에서 동시 실행
+    YOLO_PARALLEL_MODELS: bool = True
+    YOLO_MODEL_THREADS: int = 0         # 모델별 torch/ORT 스레드 수 (0 = 병렬이면 워커 예산의 절반, 순차면 전부)
+
+    # /detect/image 결과 캐시 (이미지 해시 + 모델 버전)
+    RESULT_CACHE_ENABLED: bool = True
+    RESULT_CACHE_MAX_ENTRIES: int = 512       # 메모리 LRU 항목 수
+    RESULT_CACHE_DIR: str = "cache/detect"    # 디스크 캐시 (빈 문자열이면 메모리만)
+
+    # 기동 시 워밍업 (끝나야 /health/ready 가 200)
+    WARMUP_ENABLED: bool = True
+    WARMUP_FRAME_SIZES: List[str] = ["1280x720"]   # 카메라/업로드 대표 해상도 "WxH"
+    WARMUP_RUNS: int = 2
+
+    # IP 카메라 pull 매니저
+    CAMERA_MAX: int = 32                   # 노드당 최대 카메라 수
+    STREAM_INFER_FPS: float = 40.0         # 노드 전체 pull 프레임 예산 → 카메라 수로 나눔
+    CAMERA_MAX_FPS: float = 10.0           # 카메라 1대 상한
+    CAMERA_IDLE_FPS: float = 1.0           # 시청자 없는 카메라: 디텍션/알림만 이 속도로
+    CAMERA_ALERT_COOLDOWN_SEC: float = 30.0  # 시청자 없을 때 DB 알림 기록 최소 간격 (카메라별)
+    CAMERA_OPEN_TIMEOUT_SEC: float = 10.0  # 스트림 열기 대기 한도
+    CAMERA_READ_FAIL_SEC: float = 5.0      # 읽기 실패가 이만큼 계속되면 재접속
+    CAMERA_RECONNECT_MIN_SEC: float = 1.0  # 재접속 백오프 (지수 증가)
+    CAMERA_RECONNECT_MAX_SEC: float = 30.0
+
+    # 모바일 push-ws 흐름 제어: 동시에 보낼 수 있는 프레임 수 (처리/폐기 시 1씩 반환)
+    PUSH_WS_CREDITS: int = 2
+
+    # 시청자 WebSocket 팬아웃
+    WATCHER_MAX_QUEUE: int = 4             # 시청자별 대기 frame 수 (넘치면 오래된 것부터 버림, alert는 유지)
+    WATCHER_SEND_TIMEOUT_SEC: float = 5.0  # 메시지 1개 전송이 이보다 오래 걸리면 연결 종료
+    WATCHER_MAX_DROPS: int = 100           # 연속으로 이만큼 버리면 느린 시청자로 보고 연결 종료
+    STREAM_STATS_SEC: float = 5.0          # stats 토픽 구독자에게 카메라 상태를 보내는 주기
+
+    # 시청자 품질 티어: 이름 → [최대 폭 px (0=원본), JPEG 품질]. 품질 높은 순서로 나열
+    STREAM_TIERS: Dict[str, List[int]] = {
+        "full": [0, 95], "high": [1280, 80], "medium": [854, 70], "low": [480, 50],
+    }
+    STREAM_DEFAULT_TIER: str = "full"      # 기존 클라이언트 호환: 원본 해상도
+    WATCHER_TIER_RECOVER_SENDS: int = 50   # 큐가 빈 상태로 이만큼 보내면 티어 한 단계 복구
+
+    # HTTP 소비자(MJPEG / 스냅샷)용 카메라별 최신 프레임 캐시
+    FRAME_CACHE_TIER: str = "full"         # 캐시에 담을 주석 JPEG 티어 (STREAM_TIERS 중 하나)
+    MJPEG_MAX_FPS: float = 10.0            # MJPEG 시청자 1명당 최대 전송 fps (?fps= 로 더 낮출 수 있음)
+    SNAPSHOT_HOLD_SEC: float = 10.0        # 스냅샷 요청 후 이 시간 동안은 시청자가 없어도 캐시 갱신
+    SNAPSHOT_WAIT_SEC: float = 2.0         # 캐시가 비었거나 idle 카메라면 새 프레임을 이만큼 기다림
+    FRAME_CACHE_PUSH_TTL_SEC: float = 300.0  # push 카메라 슬롯: 갱신/시청자/스냅샷이 이만큼 없으면 삭제
+    FRAME_CACHE_MAX_PUSH: int = 64         # push 카메라 슬롯 상한 (넘으면 가장 오래 조용한 슬롯부터 삭제)
+
+    # 타일 추론 (요청/카메라별로 tiled=True 일 때만): 고해상도 프레임의 작은 객체용
+    TILE_SIZE: int = 640               # 타일 한 변(원본 px). YOLO_IMGSZ와 같으면 리사이즈 없음
+    TILE_OVERLAP: float = 0.2          # 인접 타일 겹침 비율
+    TILE_MERGE_IOS: float = 0.5        # 타일 간 중복 박스 병합 기준 (교집합 / 작은 박스 면적)
+    TILE_FULL_FRAME: bool = True       # 타일과 함께 전체 프레임 축소본도 추론 (큰 객체용)
+    TILE_WORKERS: int = 4              # 타일 letterbox 병렬 스레드 수
+    TILE_BATCH_MAX: int = 16           # predict 1회당 최대 타일 뷰 수 (BATCH_MAX_SIZE는 프레임 수라 4K 타일이면 수백 장이 됨)
+
+    # 장면 변화 게이트 (IP 카메라 pull 루프): 정지 화면이면 추론 생략
+    GATE_ENABLED: bool = True
+    GATE_WIDTH: int = 64               # 비교용 축소 폭(px)
+    GATE_PIXEL_DIFF: int = 12          # 픽셀 변화로 볼 밝기 차 (0~255)
+    GATE_CHANGE_RATIO: float = 0.01    # 바뀐 픽셀 비율이 이 이상이면 추론
+    GATE_REFRESH_SEC: float = 5.0      # 변화가 없어도 이 주기마다 강제 추론
+
+    # 추적 (IP 카메라 pull 루프): N프레임마다 디텍션, 사이 프레임은 칼만 예측
+    TRACK_ENABLED: bool = True
+    TRACK_DETECT_EVERY: int = 5        # 디텍션 주기(프레임). 1이면 매 프레임 디텍션
+    TRACK_IOU: float = 0.3             # 트랙-디텍션 매칭 최소 IoU
+    TRACK_HIGH_CONF: float = 0.5       # 이 이상 디텍션을 먼저 기존 트랙에 매칭 (낮은 conf는 그다음)
+    # 새 트랙 생성 최소 conf. 0이면 라벨별 임계치(YOLO_DEFAULT_CONF / 클래스별)를 통과한 디텍션은 모두 트랙 시작.
+    # 올리면 스트림 위험 감지 임계치도 사실상 이 값으로 올라감 (예: 0.5면 NO-Hardhat 0.45는 알림 없음)
+    TRACK_NEW_CONF: float = 0.0
+    TRACK_MAX_AGE: int = 15            # 이 프레임 수만큼 못 잡으면 트랙 삭제
+    TRACK_MIN_HITS: int = 2            # 이 횟수 이상 잡힌 트랙만 위험도 계산에 사용
+    TRACK_MIN_CONFIDENCE: float = 0.3  # 예측 신뢰도가 이 밑으로 떨어지면 즉시 디텍션
+
+    # 마이크로 배칭 (여러 스트림/업로드 프레임을 모아 모델당 1회 predict)
+    BATCH_ENABLED: bool = True
+    BATCH_MAX_SIZE: int = 8
+    # 호출 유형별 최대 대기 시간(ms): 길수록 처리량↑, 지연↑
+    BATCH_WINDOW_MS: Dict[str, float] = {"stream": 30.0, "push": 15.0, "upload": 5.0}
+
     # gemini
     GEMINI_API_KEY: str | None = None
     GEMINI_MODEL: str = "gemini-1.5-flash"  # .env에서 오버라이드 가능
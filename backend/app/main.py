@@ -1,4 +1,8 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from .core.config import settings
@@ -11,10 +15,20 @@ from .models import post as _post   # 추가 (Post, Comment 등록)
 from .models import alert
 
 from .routers import auth, post, detect, alerts, stream
+from .services import lifecycle
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 모델 로드/워밍업은 백그라운드로: 그동안 /health/live 는 응답, /health/ready 는 503
+    task = asyncio.create_task(lifecycle.warm_start())
+    yield
+    task.cancel()
+    await stream.cameras.stop_all()
+    lifecycle.shutdown()
 
 
-app = FastAPI(title="Safety Risk Detection API")
+app = FastAPI(title="Safety Risk Detection API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -47,3 +61,18 @@ app.include_router(stream.router)
 def health():
     return {"ok": True}
 
+
+@app.get("/health/live")
+def health_live():
+    """프로세스 생존 여부 (liveness)"""
+    return {"ok": True}
+
+
+@app.get("/health/ready")
+def health_ready():
+    """모델 로드 + 워밍업 완료 여부 (readiness). 준비 전에는 503."""
+    st = lifecycle.state
+    body = {"ready": st["ready"], "phase": st["phase"], "phases_ms": st["phases_ms"],
+            "workers": st["workers"], "error": st["error"]}
+    return JSONResponse(body, status_code=200 if st["ready"] else 503)
+
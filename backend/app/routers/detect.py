@@ -4,6 +4,7 @@ from pathlib import Path
 from datetime import datetime
 import uuid
 import logging
+import asyncio
 import numpy as np
 import cv2
 import os
@@ -11,7 +12,10 @@ import os
 from ..db import get_db
 from ..core.config import settings
 from ..core.security import current_sub
-from ..utils.vision import YoloService
+from ..services.inference import get_service_info, get_executor, InferenceBusy
+from ..services.batching import get_batcher
+from ..services import lifecycle
+from ..services.result_cache import get_result_cache, content_key
 from ..models.user import User
 from ..models.post import Post
 from ..services.llm import generate_report_md  # LLM 보고서
@@ -21,31 +25,6 @@ log = logging.getLogger("app.detect")
 
 UPLOAD_BASE = Path(settings.UPLOAD_DIR)
 
-# -----------------------------
-# YOLO Service singleton
-# -----------------------------
-_service: YoloService | None = None
-
-def get_service() -> YoloService:
-    """Load YOLO models once and reuse."""
-    global _service
-    if _service is None:
-        def _must_exist(p: str | None, name: str):
-            if p and not Path(p).exists():
-                raise RuntimeError(f"{name} weights not found: {p}")
-
-        _must_exist(settings.YOLO_FIRE_SMOKE_WEIGHTS, "Fire/Smoke")
-        _must_exist(settings.YOLO_PPE_WEIGHTS, "PPE")
-
-        _service = YoloService(
-            settings.YOLO_FIRE_SMOKE_WEIGHTS,
-            settings.YOLO_PPE_WEIGHTS,
-            fire_labels_json=getattr(settings, "YOLO_FIRE_SMOKE_LABELS_JSON", ""),
-            ppe_labels_json=getattr(settings, "YOLO_PPE_LABELS_JSON", ""),
-            default_conf=getattr(settings, "YOLO_DEFAULT_CONF", 0.25),
-        )
-    return _service
-
 def ensure_dirs() -> None:
     (UPLOAD_BASE / "orig").mkdir(parents=True, exist_ok=True)
     (UPLOAD_BASE / "annot").mkdir(parents=True, exist_ok=True)
@@ -70,43 +49,33 @@ def compute_risk(detections: list[dict]) -> dict:
         level = "Normal"
     return {"score": score, "level": level}
 
-@router.post("/image", response_model=dict)
-async def detect_image(
-    file: UploadFile = File(...),
-    model: str = Form("both"),           # "fire" | "ppe" | "both" | "fire/smoke"
-    publish: bool = Form(False),
-    title: str | None = Form(None),
-    db: Session = Depends(get_db),
-    sub: str = Depends(current_sub),
-):
-    svc = get_service()
+def _decode(raw: bytes):
+    return cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_COLOR)
 
-    # 모델 옵션 정규화
-    model = (model or "both").strip().lower()
-    if model == "fire/smoke":
-        model = "fire"
-    if model not in ("fire", "ppe", "both"):
-        model = "both"
+def _save_original(path: Path, raw: bytes) -> None:
+    ensure_dirs()
+    with open(path, "wb") as f:
+        f.write(raw)
 
-    # 파일 읽기
-    raw = await file.read()
-    if not raw:
-        raise HTTPException(400, "empty file")
+def _save_annotated(images: dict) -> None:
+    for path, img in images.items():
+        cv2.imwrite(str(path), img)
 
-    arr = np.frombuffer(raw, dtype=np.uint8)
-    img = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+async def _detect_and_save(svc, raw: bytes, filename: str | None, model: str,
+                           tiled: bool = False) -> dict:
+    """디코드 → 원본 저장 → 추론 → 주석 이미지 저장 → 응답 dict"""
+    # 디코드/파일 쓰기는 워커 스레드에서 (큰 업로드가 이벤트 루프를 막지 않게)
+    img = await asyncio.to_thread(_decode, raw)
     if img is None:
         raise HTTPException(400, "unsupported image (try jpg/png). jfif는 jpg로 저장 권장")
 
     # 저장 경로
-    ensure_dirs()
-    ext = (file.filename or "upload.jpg").split(".")[-1].lower()
+    ext = (filename or "upload.jpg").split(".")[-1].lower()
     if ext == "jfif":
         ext = "jpg"
     stem = uuid.uuid4().hex
     orig_path = UPLOAD_BASE / "orig" / f"{stem}.{ext}"
-    with open(orig_path, "wb") as f:
-        f.write(raw)
+    await asyncio.to_thread(_save_original, orig_path, raw)
 
     detections: list[dict] = []
     annotated_urls: dict[str, str] = {}
@@ -118,8 +87,12 @@ async def detect_image(
         if model in ("ppe", "both") and not svc.ppe:
             raise HTTPException(500, "PPE model not loaded. Check YOLO_PPE_WEIGHTS")
 
-        out = svc.infer(raw, kind=model)
+        # 이미 디코드한 img를 넘겨 워커에서 다시 디코드하지 않게 함
+        # annot/*.jpg 를 저장하므로 주석 이미지까지 요청
+        out = await get_batcher().infer(img, kind=model, caller="upload", output="both",
+                                        tiled=tiled)
 
+        annotated: dict = {}
         for key in ("fire", "ppe"):
             if key in out:
                 dets = [
@@ -127,21 +100,23 @@ async def detect_image(
                     for d in out[key]["detections"]
                 ]
                 detections.extend(dets)
-                ann = out[key]["annotated"]  # BGR ndarray
                 ann_path = UPLOAD_BASE / "annot" / f"{stem}_{key}.jpg"
-                cv2.imwrite(str(ann_path), ann)
+                annotated[ann_path] = out[key]["annotated"]  # BGR ndarray
                 annotated_urls[key] = f"/uploads/annot/{ann_path.name}"
+        await asyncio.to_thread(_save_annotated, annotated)
     except HTTPException:
         raise
+    except InferenceBusy as e:
+        raise HTTPException(503, str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "inference timed out")
     except Exception as e:
         log.exception("detect failed")
         raise HTTPException(500, f"detect failed: {e!s}")
 
     risk = compute_risk(detections)
 
-    # 응답 공통
-    # ... (생략) ...
-    resp = {
+    return {
         "ok": True,
         "original_url": f"/uploads/orig/{orig_path.name}",
         "annotated": annotated_urls,
@@ -150,6 +125,43 @@ async def detect_image(
         "risk": risk,
     }
 
+@router.post("/image", response_model=dict)
+async def detect_image(
+    file: UploadFile = File(...),
+    model: str = Form("both"),           # "fire" | "ppe" | "both" | "fire/smoke"
+    publish: bool = Form(False),
+    title: str | None = Form(None),
+    tiled: bool = Form(False),           # 고해상도 이미지: 타일로 나눠 작은 객체까지 검출
+    db: Session = Depends(get_db),
+    sub: str = Depends(current_sub),
+):
+    svc = get_service_info()
+
+    # 모델 옵션 정규화
+    model = (model or "both").strip().lower()
+    if model == "fire/smoke":
+        model = "fire"
+    if model not in ("fire", "ppe", "both"):
+        model = "both"
+
+    # 파일 읽기
+    raw = await file.read()
+    if not raw:
+        raise HTTPException(400, "empty file")
+
+    # 같은 이미지 + 같은 모델 버전이면 추론/파일 저장 없이 이전 결과 재사용
+    cache = get_result_cache()
+    cache_key = content_key(raw, f"{model}_tiled" if tiled else model) if cache else None
+    cached = await asyncio.to_thread(cache.get, cache_key, svc.version) if cache else None
+    if cached is not None:
+        resp = {**cached, "cached": True}
+    else:
+        resp = await _detect_and_save(svc, raw, file.filename, model, tiled)
+        if cache:
+            await asyncio.to_thread(cache.put, cache_key, svc.version, resp)
+        resp = {**resp, "cached": False}
+    detections = resp["detections"]
+
     if publish:
         user = db.query(User).get(sub)
         if not user:
@@ -182,9 +194,10 @@ async def detect_image(
             )
 
         # (선택) 첨부파일 메타도 같이 넣기
-        attachments = [{"file_name": f"original_{orig_path.name}", "file_url": resp["original_url"]}]
+        orig_name = resp["original_url"].rsplit("/", 1)[-1]
+        attachments = [{"file_name": f"original_{orig_name}", "file_url": resp["original_url"]}]
         for k, v in (resp.get("annotated") or {}).items():
-            attachments.append({"file_name": f"{k}_{orig_path.stem}.jpg", "file_url": v})
+            attachments.append({"file_name": f"{k}_{Path(orig_name).stem}.jpg", "file_url": v})
 
         p = Post(
             author_id=user.id,
@@ -201,10 +214,17 @@ async def detect_image(
 
 @router.get("/health", response_model=dict)
 def detect_heath():
-    svc = get_service()
+    svc = get_service_info()
     return {
         "fire_loaded": bool(getattr(svc, "fire", None)),
         "ppe_loaded": bool(getattr(svc, "ppe", None)),
         "fire_weights": getattr(svc, "fire_weights", None),
         "ppe_weights": getattr(svc, "ppe_weights", None),
+        "engine": getattr(svc, "engine", None),
+        "precision": {"fire": getattr(svc, "fire_precision", None), "ppe": getattr(svc, "ppe_precision", None)},
+        "executor": get_executor().stats(),
+        "batching": get_batcher().stats(),
+        "ready": lifecycle.state["ready"],
+        "startup_ms": lifecycle.state["phases_ms"],
+        "result_cache": (get_result_cache().stats() if get_result_cache() else None),
     }
\ No newline at end of file
@@ -1,8 +1,12 @@
 # app/routers/stream.py
 import asyncio
 import base64
-import re
-from typing import List, Optional, Set, Tuple, Dict, Any
+import contextlib
+import json
+import logging
+import struct
+import time
+from typing import Collection, List, Optional, Tuple, Dict, Any
 
 import cv2
 import numpy as np
@@ -11,42 +15,106 @@ from fastapi import (
     WebSocket,
     WebSocketDisconnect,
     HTTPException,
+    Request,
 )
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 
-from ..utils.vision import YoloService
-from .detect import compute_risk, get_service  # detect.py의 유틸 재사용
+from ..core.config import settings
+from ..db import SessionLocal
+from ..models.alert import Alert
+from ..utils.capture import FrameGrabber
+from ..utils.encoding import TierEncoder
+from ..utils.gating import SceneGate
+from ..utils.roi import RoiMask
+from ..utils.tracking import Tracker
+from ..services.inference import InferenceBusy, ServiceInfo, get_service_info
+from ..services.batching import get_batcher
+from ..services.watchers import ImageKey, Outgoing, Watcher, WatcherHub, get_watcher_hub
+from ..services.cameras import Camera, CameraConfig, CameraManager, get_camera_manager
+from ..services.framecache import MJPEG_BOUNDARY, CachedFrame, FrameCache, get_frame_cache
+from .detect import compute_risk  # detect.py의 유틸 재사용
 
 router = APIRouter(prefix="/stream", tags=["stream"])
+log = logging.getLogger("app.stream")
 
 # ============================================================== 
 # 시청자(WebSocket) 관리 및 브로드캐스트
 # ==============================================================
-watchers: Set[WebSocket] = set()
-
-async def _broadcast(msg: dict) -> None:
-    dead: List[WebSocket] = []
-    for ws in list(watchers):
-        try:
-            await ws.send_json(msg)
-        except Exception:
-            dead.append(ws)
-    for ws in dead:
-        watchers.discard(ws)
+# 시청자마다 송신 큐 + writer 태스크 → 느린 시청자가 카메라 루프/다른 시청자를 막지 않음
+watchers: WatcherHub = get_watcher_hub()
+# HTTP 소비자(MJPEG/스냅샷)용 카메라별 최신 주석 프레임
+frames: FrameCache = get_frame_cache()
+
+def _broadcast(msg: dict, images: Optional[Dict[ImageKey, bytes]] = None) -> Outgoing:
+    """모든 시청자 큐에 넣기만 함 (네트워크 대기 없음). 직렬화는 형식/모드/티어별 1회."""
+    if images and msg.get("type") == "frame":
+        jpeg = images.get(("annotated", frames.tier))
+        if jpeg is not None:
+            frames.update(msg["camera"], jpeg, msg)   # 이미 인코딩된 bytes를 그대로 캐시
+    return watchers.publish(msg, images)
 
 @router.websocket("/ws")
-async def ws_watch(ws: WebSocket):
-    """데스크톱(또는 다른 클라이언트)에서 주석 프레임을 '구독'하는 채널."""
+async def ws_watch(ws: WebSocket, format: str = "json", mode: str = "annotated",
+                   tier: Optional[str] = None, cameras: Optional[str] = None,
+                   topics: Optional[str] = None):
+    """
+    데스크톱(또는 다른 클라이언트)에서 주석 프레임을 '구독'하는 채널.
+    ?format=binary 면 [uint32 헤더 길이][헤더 JSON][JPEG] 바이너리 메시지 (base64 없음),
+    기본(json)은 기존처럼 image 필드에 dataURL을 담은 JSON 텍스트.
+    ?mode=annotated(기본) | raw(원본 JPEG + 디텍션, 클라이언트가 그림) | meta(디텍션/위험도만)
+    ?tier=full(기본) | high | medium | low (STREAM_TIERS) — 요청한 최대 품질. 따라오지 못하면 자동으로 낮춤
+    ?cameras=crane-1,gate (기본: 전체) &topics=frames,alerts,stats (기본: frames,alerts)
+    접속 중 구독 변경: 텍스트 {"subscribe": {"cameras": [...], "topics": [...]}} → {"type":"subscribed",...} 회신
+    """
     await ws.accept()
-    watchers.add(ws)
+    w = watchers.add(ws, format.lower(), mode.lower(), (tier or "").lower() or None,
+                     cameras=_split_csv(cameras), topics=_split_csv(topics, lower=True))
     try:
-        # 클라이언트가 보낸 ping 텍스트를 받아 연결 유지
+        # 클라이언트가 보낸 ping 텍스트를 받아 연결 유지 (구독 변경 메시지만 해석)
         while True:
-            await ws.receive_text()
-    except WebSocketDisconnect:
-        pass
+            text = await ws.receive_text()
+            sub = _parse_subscribe(text)
+            if sub is not None:
+                watchers.subscribe(w, **sub)
+                # 회신도 writer 큐를 거쳐서 보냄 (소켓 송신은 writer 태스크만)
+                w.offer(Outgoing({"type": "subscribed",
+                                  "cameras": sorted(w.cameras) if w.cameras is not None else None,
+                                  "topics": sorted(w.topics)}), droppable=False)
+    except (WebSocketDisconnect, RuntimeError):
+        pass  # RuntimeError: 느린 시청자로 서버가 먼저 끊은 경우
     finally:
-        watchers.discard(ws)
+        watchers.remove(w)
+
+def _split_csv(value: Optional[str], lower: bool = False) -> Optional[List[str]]:
+    if not value:
+        return None
+    items = [v.strip() for v in value.split(",") if v.strip()]
+    return [v.lower() for v in items] if lower else items
+
+def _parse_subscribe(text: str) -> Optional[Dict[str, Optional[List[str]]]]:
+    """
+    {"subscribe": {"cameras": [...], "topics": [...]}} → watchers.subscribe() 인자. ping 등 그 외는 None.
+    변경(update) 의미: 빠진 키는 현재 구독 유지, null 이면 초기화 (cameras=["*"] 도 전체 카메라)
+    """
+    if not text.startswith("{"):
+        return None
+    try:
+        sub = json.loads(text).get("subscribe")
+    except (ValueError, AttributeError):
+        return None
+    if not isinstance(sub, dict):
+        return None
+    changes: Dict[str, Optional[List[str]]] = {}
+    for key, lower in (("cameras", False), ("topics", True)):
+        if key not in sub:
+            continue
+        value = sub[key]
+        if value is None:
+            changes[key] = None
+        elif isinstance(value, list) and value:
+            changes[key] = [str(v).lower() if lower else str(v) for v in value]
+    return changes
 
 # ============================================================== 
 # 공통 유틸: 디텍션 정규화/그리기
@@ -59,6 +127,7 @@ SHOW_PPE_ONLY_WARNINGS = True  # True면 NO- 계열만 노출
 FIRE_COLOR  = (255,   0,   0)  # BGR 파랑
 PPE_COLOR   = (  0, 255, 255)  # BGR 노랑
 DBG_COLOR   = (255, 255, 255)
+ROI_COLOR   = (  0, 255,   0)  # BGR 초록
 
 def _to_dict(d: Any) -> Dict[str, Any]:
     """YOLO 결과 객체/딕셔너리를 안전하게 직렬화"""
@@ -72,18 +141,28 @@ def _to_dict(d: Any) -> Dict[str, Any]:
         bbox  = getattr(d, "bbox", None)
     if isinstance(bbox, (list, tuple)):
         bbox = [float(x) for x in bbox]
-    return {"label": str(label), "conf": conf, "bbox": bbox}
+    out = {"label": str(label), "conf": conf, "bbox": bbox}
+    # 추적 ID는 Tracker가 내보내는 dict에만 있음
+    if isinstance(d, dict) and d.get("track_id") is not None:
+        out["track_id"] = int(d["track_id"])
+    return out
 
 def _split_detections(out: Dict[str, Any]) -> Tuple[List[Dict], List[Dict]]:
     """infer 결과에서 fire/ppe 디텍션 분리"""
     fire_dets: List[Dict] = []
     ppe_dets:  List[Dict] = []
 
+    def _dicts(dets: Any) -> List[Dict]:
+        # DetectionSet은 열 단위로 한 번에 변환
+        if hasattr(dets, "to_dicts"):
+            return dets.to_dicts()
+        return [_to_dict(d) for d in dets]
+
     if "fire" in out and out["fire"] and "detections" in out["fire"]:
-        fire_dets = [_to_dict(d) for d in out["fire"]["detections"]]
+        fire_dets = _dicts(out["fire"]["detections"])
 
     if "ppe" in out and out["ppe"] and "detections" in out["ppe"]:
-        ppe_dets = [_to_dict(d) for d in out["ppe"]["detections"]]
+        ppe_dets = _dicts(out["ppe"]["detections"])
 
     # PPE 필터링
     if SHOW_PPE_ONLY_WARNINGS:
@@ -101,6 +180,8 @@ def _draw_boxes(img: np.ndarray, dets: List[Dict], color: Tuple[int, int, int])
         x1, y1, x2, y2 = map(int, d["bbox"])
         cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
         label = f'{d["label"]} {d["conf"]:.2f}'
+        if d.get("track_id") is not None:
+            label = f'#{d["track_id"]} {label}'
         cv2.putText(img, label, (x1, max(12, y1 - 6)),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
 
@@ -111,204 +192,705 @@ def _draw_debug_hud(img: np.ndarray, fire_cnt: int, ppe_cnt: int, fire_loaded: b
     cv2.putText(img, text, (10, 20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, DBG_COLOR, 2)
 
 def _render_overlay(frame: np.ndarray, fire_dets: List[Dict], ppe_dets: List[Dict],
-                    fire_loaded: bool, ppe_loaded: bool) -> np.ndarray:
-    """한 프레임에 fire(파랑), ppe(노랑) 겹쳐 그리기 + 디버그 HUD"""
-    view = frame.copy()
+                    fire_loaded: bool, ppe_loaded: bool, roi: Optional[RoiMask] = None,
+                    encoder: Optional[TierEncoder] = None) -> np.ndarray:
+    """한 프레임에 fire(파랑), ppe(노랑) 겹쳐 그리기 + 디버그 HUD (+ ROI 외곽선). encoder가 있으면 그 캔버스 재사용"""
+    view = encoder.canvas(frame) if encoder is not None else frame.copy()
+    if roi is not None:
+        cv2.polylines(view, roi.outline(*view.shape[:2]), True, ROI_COLOR, 1)
     _draw_boxes(view, fire_dets, FIRE_COLOR)
     _draw_boxes(view, ppe_dets, PPE_COLOR)
     _draw_debug_hud(view, len(fire_dets), len(ppe_dets), fire_loaded, ppe_loaded)
     return view
 
-def _encode_data_url(img_bgr: np.ndarray) -> str:
-    ok, jpg = cv2.imencode(".jpg", img_bgr)
-    if not ok:
-        raise RuntimeError("encode failed")
-    return "data:image/jpeg;base64," + base64.b64encode(jpg.tobytes()).decode()
+def _make_encoder() -> TierEncoder:
+    """생산자(카메라 루프 / push 연결)마다 1개 — 리사이즈/캔버스 버퍼를 프레임 간에 재사용"""
+    return TierEncoder(settings.STREAM_TIERS)
 
-# ✨ 핵심: both일 때 두 모델을 **명시적으로 각각** 실행해 합친다
-def _infer_both_forced(svc: YoloService, frame: np.ndarray, kind: str) -> Dict[str, Any]:
+# ✨ 핵심: both일 때 두 모델을 **동시에** 실행해 {"fire":..., "ppe":...}로 합친다
+#    추론은 배처 → 워커 풀에서 돌고, 여기서는 await만 하므로 이벤트 루프가 막히지 않는다.
+#    (fire/ppe는 YoloService 안에서 각자 전용 스레드로 동시에 실행됨)
+#    caller: "stream"(IP 카메라) | "push"(모바일) — 배칭 윈도우가 다름
+async def _infer_both_forced(svc: ServiceInfo, frame: np.ndarray, kind: str,
+                             caller: str = "stream", tiled: bool = False) -> Dict[str, Any]:
     kind = (kind or "both").lower()
-    result: Dict[str, Any] = {}
-
-    if kind in ("fire", "both") and getattr(svc, "fire", None) is not None:
-        try:
-            o = svc.infer(frame, kind="fire")  # ndarray 직접
-            if isinstance(o, dict) and "fire" in o:
-                result["fire"] = o["fire"]
-        except Exception:
-            pass
-
-    if kind in ("ppe", "both") and getattr(svc, "ppe", None) is not None:
-        try:
-            o = svc.infer(frame, kind="ppe")
-            if isinstance(o, dict) and "ppe" in o:
-                result["ppe"] = o["ppe"]
-        except Exception:
-            pass
-
-    return result
+    fire_on = kind in ("fire", "both") and bool(svc.fire)
+    ppe_on  = kind in ("ppe", "both") and bool(svc.ppe)
+    if not (fire_on or ppe_on):
+        return {}
+    # 두 모델 모두 필요하면 "both" 한 번으로 제출 → 서비스 안에서 두 모델이 병렬 실행
+    kind = "both" if (fire_on and ppe_on) else ("fire" if fire_on else "ppe")
+
+    # 박스는 _render_overlay에서 직접 그리므로 주석 이미지는 요청하지 않음
+    # InferenceBusy / 타임아웃 / 추론 실패는 그대로 올림 → 호출 쪽에서 이번 프레임을 건너뜀
+    # (빈 결과로 바꾸면 '위험 없음'으로 방송되고 게이트/추적기 상태까지 오염됨)
+    out = await get_batcher().submit(frame, kind, caller=caller, output="detections", tiled=tiled)
+    return {k: v for k, v in out.items() if k in ("fire", "ppe")}
+
+def _infer_error(e: BaseException) -> str:
+    if isinstance(e, asyncio.TimeoutError):
+        return "inference timed out"
+    return str(e) or type(e).__name__
+
+def _render_and_encode(encoder: TierEncoder, frame: np.ndarray, fire_dets: List[Dict], ppe_dets: List[Dict],
+                       fire_loaded: bool, ppe_loaded: bool, roi: Optional[RoiMask] = None,
+                       wants: Collection[ImageKey] = (("annotated", "full"),)) -> Dict[ImageKey, bytes]:
+    """
+    시청자가 요구하는 (모드, 티어) 이미지만 만든다 (asyncio.to_thread 로 호출).
+      annotated → 오버레이 1번 그리고 티어별 리사이즈 + JPEG, raw → 원본을 티어별 JPEG
+    같은 (모드, 티어)는 프레임당 1번만 인코딩.
+    """
+    images: Dict[ImageKey, bytes] = {}
+    for mode, src in (("annotated", None), ("raw", frame)):
+        tiers = sorted({t for m, t in wants if m == mode})
+        if not tiers:
+            continue
+        if src is None:
+            src = _render_overlay(frame, fire_dets, ppe_dets, fire_loaded, ppe_loaded, roi, encoder)
+        for t, jpeg in encoder.encode_tiers(src, tiers).items():
+            images[(mode, t)] = jpeg
+    return images
+
+async def _images_for(encoder: TierEncoder, frame: np.ndarray, fire_dets: List[Dict], ppe_dets: List[Dict],
+                      fire_loaded: bool, ppe_loaded: bool, roi: Optional[RoiMask] = None,
+                      camera_id: Optional[str] = None,
+                      extra: Collection[ImageKey] = ()) -> Dict[ImageKey, bytes]:
+    """현재 시청자 수요(+ extra, HTTP 캐시)에 맞춰 렌더/인코딩. 아무도 이미지가 필요 없으면 스레드도 안 씀."""
+    wants = watchers.demand_for(camera_id) | set(extra)
+    if frames.wants(camera_id):
+        wants.add(("annotated", frames.tier))
+    if not wants:
+        return {}
+    return await asyncio.to_thread(
+        _render_and_encode, encoder, frame, fire_dets, ppe_dets, fire_loaded, ppe_loaded, roi, wants)
 
 # ============================================================== 
 # IP 카메라 Pull 모드 (백그라운드 루프)
 # ==============================================================
+class RoiRegion(BaseModel):
+    # 프레임 대비 0~1 비율 좌표. 둘 중 하나만 지정
+    rect: Optional[List[float]] = None           # [x1, y1, x2, y2]
+    polygon: Optional[List[List[float]]] = None  # [[x, y], ...] (3점 이상)
+
 class StartBody(BaseModel):
     url: str
+    camera_id: str = "default"  # 같은 ID로 다시 start하면 새 설정으로 재시작
     kind: str = "both"  # "fire" | "ppe" | "both" | "fire/smoke"
+    tiled: bool = False # 4K 등 고해상도 카메라: 타일 추론
+    roi: List[RoiRegion] = []  # 비어 있으면 전체 프레임
+
+class StopBody(BaseModel):
+    camera_id: Optional[str] = None  # None이면 전체 카메라 정지
+
+class RoiBody(BaseModel):
+    camera_id: str = "default"
+    regions: List[RoiRegion] = []  # 빈 리스트면 ROI 해제
 
-_stop = asyncio.Event()
-_state: dict = {"url": None, "kind": "both"}
+def _norm_kind(kind: str) -> str:
+    k = (kind or "both").lower()
+    return "fire" if k == "fire/smoke" else k
+
+def _make_roi(regions: List[RoiRegion]) -> Optional[RoiMask]:
+    if not regions:
+        return None
+    try:
+        return RoiMask([r.model_dump() for r in regions])
+    except ValueError as e:
+        raise HTTPException(400, str(e))
+
+def _make_gate() -> Optional[SceneGate]:
+    if not settings.GATE_ENABLED:
+        return None
+    return SceneGate(
+        width=settings.GATE_WIDTH,
+        pixel_diff=settings.GATE_PIXEL_DIFF,
+        change_ratio=settings.GATE_CHANGE_RATIO,
+        refresh_sec=settings.GATE_REFRESH_SEC,
+    )
+
+def _make_trackers() -> Optional[Tuple[Tracker, Tracker]]:
+    """fire / ppe 각각 독립 추적기 (라벨 공간이 달라 섞지 않음)"""
+    if not settings.TRACK_ENABLED:
+        return None
+    def _one() -> Tracker:
+        return Tracker(
+            detect_every=settings.TRACK_DETECT_EVERY,
+            iou_thr=settings.TRACK_IOU,
+            high_conf=settings.TRACK_HIGH_CONF,
+            max_age=settings.TRACK_MAX_AGE,
+            min_hits=settings.TRACK_MIN_HITS,
+            min_confidence=settings.TRACK_MIN_CONFIDENCE,
+            new_track_conf=settings.TRACK_NEW_CONF,
+        )
+    return _one(), _one()
+
+def _confirmed(dets: List[Dict]) -> List[Dict]:
+    """추적 중이면 확정 트랙만 (한 번 잡히고 사라진 오검출은 위험도에서 제외)"""
+    return [d for d in dets if d.get("confirmed", True)]
 
 @router.post("/start")
 async def start_stream(body: StartBody):
-    _state["url"] = body.url
-    _state["kind"] = "fire" if body.kind.lower() == "fire/smoke" else body.kind.lower()
-    _stop.clear()
-    asyncio.create_task(_pull_loop())
-    return {"ok": True}
+    cfg = CameraConfig(id=body.camera_id, url=body.url, kind=_norm_kind(body.kind),
+                       tiled=body.tiled, roi=_make_roi(body.roi))
+    try:
+        await cameras.start(cfg)
+    except RuntimeError as e:
+        raise HTTPException(429, str(e))
+    return {"ok": True, "camera_id": cfg.id}
+
+@router.get("/cameras")
+async def list_cameras():
+    return {"cameras": cameras.list(), "frame_interval_sec": round(cameras.frame_interval(), 3),
+            "watchers": watchers.stats(), "frame_cache": frames.stats()}
+
+@router.put("/roi")
+async def set_roi(body: RoiBody):
+    """실행 중인 카메라의 ROI 교체 (다음 프레임부터 적용, 재시작 불필요)"""
+    cam = cameras.get(body.camera_id)
+    if cam is None:
+        raise HTTPException(404, f"camera not running: {body.camera_id}")
+    cam.cfg.roi = _make_roi(body.regions)
+    return {"ok": True, "camera_id": cam.id, "regions": len(body.regions)}
 
 @router.post("/stop")
-async def stop_stream():
-    _stop.set()
-    return {"ok": True}
-
-async def _pull_loop():
-    """IP 카메라에서 프레임을 당겨와 추론 후 시청자에게 방송"""
-    svc: YoloService = get_service()
-    url: Optional[str] = _state.get("url")
-    kind: str = _state.get("kind", "both")
-    if not url:
-        return
-
-    cap = cv2.VideoCapture(url)
-    if not cap.isOpened():
-        await _broadcast({"type": "error", "message": "cannot open stream"})
-        return
-
-    fire_loaded = bool(getattr(svc, "fire", None))
-    ppe_loaded  = bool(getattr(svc, "ppe", None))
+async def stop_stream(body: Optional[StopBody] = None):
+    if body is None or body.camera_id is None:
+        ids = [c.id for c in cameras.cameras()]
+        stopped = await cameras.stop_all()
+        for cam_id in ids:
+            frames.drop(cam_id)
+        return {"ok": True, "stopped": stopped}
+    if not await cameras.stop(body.camera_id):
+        raise HTTPException(404, f"camera not running: {body.camera_id}")
+    frames.drop(body.camera_id)
+    return {"ok": True, "stopped": 1}
+
+def _grab_view(grabber: FrameGrabber, roi: Optional[RoiMask], gate: Optional[SceneGate] = None,
+               timeout: float = 1.0) -> Optional[Tuple[np.ndarray, float, np.ndarray, Tuple[int, int], bool]]:
+    """
+    최신 프레임 + ROI 뷰 + 장면 변화 판정 → (frame, age, view, origin, changed).
+    gate가 없으면 changed=True. 축소/흑백/블러가 들어가는 게이트 판정까지 블로킹이므로
+    asyncio.to_thread 로 호출.
+    """
+    got = grabber.latest(timeout)
+    if got is None:
+        return None
+    frame, age = got
+    view, origin = roi.apply(frame) if roi is not None else (frame, (0, 0))
+    changed = gate is None or gate.should_infer(view)
+    return frame, age, view, origin, changed
+
+async def _pull_loop(cam: Camera) -> None:
+    """
+    카메라 1대: 캡처 스레드의 최신 프레임을 추론 후 시청자에게 방송.
+    스트림이 열리지 않거나 읽기가 계속 실패하면 예외 → CameraManager가 백오프 후 재접속.
+    """
+    svc: ServiceInfo = get_service_info()
+
+    # 캡처 스레드가 소스를 계속 비우고 최신 프레임만 남김 → 추론이 느려도 지연이 쌓이지 않음
+    grabber = FrameGrabber(cam.cfg.url, read_fail_sec=settings.CAMERA_READ_FAIL_SEC, name=cam.id).start()
+    cam.capture = grabber
+    if not await asyncio.to_thread(grabber.wait_open, settings.CAMERA_OPEN_TIMEOUT_SEC):
+        grabber.stop(join_timeout=0)
+        msg = grabber.error or "open timeout"
+        _broadcast({"type": "error", "camera": cam.id, "message": msg})
+        raise ConnectionError(msg)
+    cam.status = "running"
+
+    fire_loaded = bool(svc.fire)
+    ppe_loaded  = bool(svc.ppe)
+
+    # 장면이 안 바뀌면 추론 생략하고 직전 결과 재사용
+    gate = _make_gate()
+    cam.gate = gate
+    # N프레임마다만 디텍션, 사이 프레임은 추적기가 박스를 예측
+    trackers = _make_trackers()
+    last: Optional[Tuple[List[Dict], List[Dict], Dict]] = None
+    roi: Optional[RoiMask] = None
+    encoder = _make_encoder()
+    stats_at = 0.0
 
     try:
-        while not _stop.is_set():
-            ok, frame = cap.read()
-            if not ok:
-                await asyncio.sleep(0.2)
+        while not cam.stopped:
+            t0 = time.monotonic()
+
+            # 시청자(WebSocket/MJPEG/최근 스냅샷)가 없으면 idle: 저속 디텍션 + 알림 기록만
+            idle = not watchers.modes_for(cam.id) and not frames.wants(cam.id)
+            if idle != cam.idle:
+                cam.idle = idle
+                grabber.decode_all = not idle   # idle 중에는 가져갈 프레임만 디코드
+                log.info("camera %s %s", cam.id, "idle" if idle else "active")
+
+            # stats 구독자가 있을 때만 주기적으로 카메라 상태 방송
+            if t0 - stats_at >= settings.STREAM_STATS_SEC and watchers.has_subscribers(cam.id, "stats"):
+                stats_at = t0
+                _broadcast({"type": "stats", "camera": cam.id, "stats": cam.info()})
+
+            # ROI가 바뀌면 이전 결과/추적/게이트 기준을 버리고 새 영역으로 다시 시작
+            if cam.cfg.roi is not roi:
+                roi = cam.cfg.roi
+                last = None
+                if gate is not None:
+                    gate.reset()
+                if trackers is not None:
+                    for t in trackers:
+                        t.reset()
+
+            # 이번 프레임 방침: 첫 프레임이면 추론, 추적 중간 프레임이면 예측만, 그 외엔 게이트가 판정
+            if last is None:
+                policy = "infer"
+            elif trackers is not None and not idle and not any(t.need_detect() for t in trackers):
+                policy = "track"
+            else:
+                policy = "gate"
+
+            # 프레임 대기 + ROI 적용(폴리곤 마스킹 복사) + 게이트 판정은 이벤트 루프 밖에서
+            got = await asyncio.to_thread(_grab_view, grabber, roi, gate if policy == "gate" else None)
+            if got is None:
+                if grabber.failed:
+                    raise ConnectionError(grabber.error)
                 continue
+            frame, age, view, origin, changed = got
+            cam.frames += 1
 
             try:
-                out = _infer_both_forced(svc, frame, kind)
-                fire_dets, ppe_dets = _split_detections(out)
+                fresh = policy != "track" and changed
+
+                if fresh:
+                    out = await _infer_both_forced(svc, view, cam.cfg.kind, tiled=cam.cfg.tiled)
+                    fire_dets, ppe_dets = _split_detections(out)
+                    if roi is not None:
+                        fire_dets = roi.restore(fire_dets, origin)
+                        ppe_dets = roi.restore(ppe_dets, origin)
+                    if trackers is not None:
+                        fire_dets = trackers[0].update(fire_dets, frame.shape)
+                        ppe_dets = trackers[1].update(ppe_dets, frame.shape)
+                    risk = compute_risk(_confirmed(fire_dets + ppe_dets))
+                    last = (fire_dets, ppe_dets, risk)
+                    if gate is not None:
+                        gate.mark_analyzed()
+                elif trackers is not None:
+                    # 추적 중간 프레임만 박스를 전진 (나이 증가). 게이트가 건너뛴 정지 장면은 트랙을 그대로 유지
+                    if policy == "track":
+                        fire_dets, ppe_dets = trackers[0].predict(), trackers[1].predict()
+                    else:
+                        fire_dets, ppe_dets = trackers[0].hold(), trackers[1].hold()
+                    risk = last[2]
+                else:
+                    fire_dets, ppe_dets, risk = last
                 all_dets = fire_dets + ppe_dets
-                risk = compute_risk(all_dets)
-
-                view = _render_overlay(frame, fire_dets, ppe_dets, fire_loaded, ppe_loaded)
-                data_url = _encode_data_url(view)
 
-                if risk["level"] in ("High", "Critical"):
-                    await _broadcast({
+                # 재사용 결과로는 알림을 반복하지 않음
+                if fresh and risk["level"] in ("High", "Critical"):
+                    alert = {
                         "type": "alert",
+                        "camera": cam.id,
                         "severity": risk["level"],
                         "message": "위험 감지",
                         "risk": risk,
                         "detections": all_dets,
-                    })
-
-                await _broadcast({
+                    }
+                    if watchers.has_subscribers(cam.id, "alerts"):
+                        _broadcast(alert)   # idle이어도 알림 구독자에게는 바로 전달
+                    else:
+                        await _record_alert(cam, alert)   # 보는 사람이 없으면 DB에 남김
+
+                if idle:
+                    await cam.sleep(cameras.frame_interval(cam) - (time.monotonic() - t0))
+                    continue
+
+                images = await _images_for(encoder, frame, fire_dets, ppe_dets, fire_loaded, ppe_loaded, roi,
+                                           camera_id=cam.id)
+                _broadcast({
                     "type": "frame",
-                    "image": data_url,
+                    "camera": cam.id,
+                    "frame_size": [int(frame.shape[1]), int(frame.shape[0])],
                     "detections": all_dets,
                     "risk": risk,
-                })
+                    "reused": not fresh,
+                    "latency_ms": round((age + time.monotonic() - t0) * 1000, 1),
+                }, images)
 
+            except InferenceBusy:
+                pass  # 워커 풀 포화: 이번 프레임은 건너뜀
             except Exception as e:
-                await _broadcast({"type": "error", "message": str(e)})
+                # 타임아웃/추론 실패: last·게이트·추적기는 건드리지 않고 이번 프레임만 건너뜀
+                _broadcast({"type": "error", "camera": cam.id, "message": _infer_error(e)})
 
-            await asyncio.sleep(0.1)  # ~10 FPS
+            # 노드 전체 추론 예산을 카메라 수로 나눈 간격 유지 (새 시청자가 오면 바로 깨어남)
+            await cam.sleep(cameras.frame_interval(cam) - (time.monotonic() - t0))
     finally:
-        cap.release()
+        await asyncio.to_thread(grabber.stop)
+
+async def _record_alert(cam: Camera, alert: Dict[str, Any]) -> None:
+    """시청자 없는 카메라의 위험 알림을 Alert 테이블에 기록 (카메라별 쿨다운)"""
+    now = time.monotonic()
+    if now - cam.last_alert_at < settings.CAMERA_ALERT_COOLDOWN_SEC:
+        return
+    cam.last_alert_at = now
+
+    def _save() -> None:
+        db = SessionLocal()
+        try:
+            db.add(Alert(
+                severity="critical" if alert["severity"] == "Critical" else "warning",
+                message=f"[{cam.id}] {alert['message']}",
+                meta={"camera": cam.id, "risk": alert["risk"], "detections": alert["detections"]},
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    try:
+        await asyncio.to_thread(_save)
+    except Exception:
+        log.exception("failed to record alert for camera %s", cam.id)
+
+cameras: CameraManager = get_camera_manager(_pull_loop)
+
+def _wake_subscribed(w: Watcher) -> None:
+    """새 구독이 생기면 해당 idle 카메라를 다음 sleep까지 기다리지 않고 바로 깨움"""
+    if w.cameras is None:
+        cameras.wake_all()
+        return
+    for cam_id in w.cameras:
+        cam = cameras.get(cam_id)
+        if cam is not None:
+            cam.wake()
+
+watchers.on_subscribe.append(_wake_subscribed)
 
 # ============================================================== 
-# 모바일 Push (HTTP: dataURL JPEG) — iOS 대응용 폴백
+# HTTP 소비자 (NVR / 월 디스플레이 / 스크립트): MJPEG, 스냅샷 — 캐시된 bytes만 전송
 # ==============================================================
-_DATAURL_RE = re.compile(r"^data:image\/jpeg;base64,(.+)$", re.I)
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    if not header:
+        return False
+    tags = [t.strip() for t in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+async def _cached_frame(camera_id: str) -> CachedFrame:
+    """
+    스냅샷용 최신 프레임. 요청 자체가 수요로 잡혀(SNAPSHOT_HOLD_SEC) 다음 프레임부터 캐시가 갱신됨.
+    캐시가 비었거나, 카메라가 idle이었거나, 캐시가 SNAPSHOT_HOLD_SEC보다 오래됐으면
+    (시청자가 meta/raw/다른 티어뿐이라 캐시용 이미지를 안 만들던 경우) 깨워서 새 프레임을 잠깐 기다림.
+    """
+    cam = cameras.get(camera_id)
+    if cam is None and not frames.has(camera_id):
+        raise HTTPException(404, f"no frames for camera: {camera_id}")
+    frames.touch_snapshot(camera_id)
+    f = frames.latest(camera_id)
+    stale = f is None or time.time() - f.ts > settings.SNAPSHOT_HOLD_SEC
+    if stale or (cam is not None and cam.idle):
+        if cam is not None:
+            cam.wake()   # push 소스는 깨울 수 없으니 다음 푸시를 기다림
+        f = await frames.wait_next(camera_id, f.seq if f is not None else 0,
+                                   settings.SNAPSHOT_WAIT_SEC) or f
+    if f is None:
+        raise HTTPException(503, f"no frame yet for camera: {camera_id}")
+    return f
+
+def _cache_headers(f: CachedFrame) -> Dict[str, str]:
+    return {"ETag": f.etag, "Cache-Control": "no-cache", "X-Frame-Seq": str(f.seq)}
+
+@router.get("/snapshot")
+async def snapshot(request: Request, camera_id: str = "default"):
+    """최신 주석 JPEG. If-None-Match 가 현재 ETag와 같으면 304 (프레임이 안 바뀜)"""
+    f = await _cached_frame(camera_id)
+    if _etag_matches(request.headers.get("if-none-match"), f.etag):
+        return Response(status_code=304, headers=_cache_headers(f))
+    return Response(f.jpeg, media_type="image/jpeg", headers=_cache_headers(f))
+
+@router.get("/latest")
+async def latest_detections(request: Request, camera_id: str = "default"):
+    """스냅샷과 같은 프레임의 디텍션/위험도 (ETag 공유 → 이미지와 짝을 맞출 수 있음)"""
+    f = await _cached_frame(camera_id)
+    if _etag_matches(request.headers.get("if-none-match"), f.etag):
+        return Response(status_code=304, headers=_cache_headers(f))
+    return JSONResponse({**f.meta, "seq": f.seq, "ts": f.ts}, headers=_cache_headers(f))
+
+@router.get("/mjpeg")
+async def mjpeg(camera_id: str = "default", fps: float = 0):
+    """
+    multipart/x-mixed-replace MJPEG. <img src="/stream/mjpeg?camera_id=..."> 나 NVR에서 바로 사용.
+    시청자마다 새 프레임을 기다렸다가 캐시의 파트 bytes를 그대로 씀 (느린 시청자는 중간 프레임을 건너뜀).
+    """
+    if cameras.get(camera_id) is None and not frames.has(camera_id):
+        raise HTTPException(404, f"no frames for camera: {camera_id}")
+    max_fps = settings.MJPEG_MAX_FPS
+    interval = 1.0 / (min(fps, max_fps) if fps > 0 else max_fps)
+
+    async def _parts():
+        frames.attach(camera_id)
+        cam = cameras.get(camera_id)
+        if cam is not None:
+            cam.wake()   # idle 카메라면 바로 인코딩 시작
+        try:
+            seq = 0
+            while True:
+                t0 = time.monotonic()
+                f = await frames.wait_next(camera_id, seq, 5.0)
+                if f is None:
+                    if not frames.has(camera_id):
+                        break   # 카메라 정지
+                    continue
+                seq = f.seq
+                yield f.part
+                await asyncio.sleep(interval - (time.monotonic() - t0))
+        finally:
+            frames.detach(camera_id)
+
+    return StreamingResponse(
+        _parts(),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}",
+        headers={"Cache-Control": "no-cache, no-store", "Pragma": "no-cache"},
+    )
+
+# ============================================================== 
+# 모바일 Push 공통
+# ==============================================================
+PUSH_DEFAULT_CAMERA = "mobile"
+
+def _decode_jpeg(buf: Any) -> Optional[np.ndarray]:
+    """bytes / memoryview 를 복사 없이 np 뷰로 감싸서 디코드 (실패 시 None)"""
+    arr = np.frombuffer(buf, np.uint8)
+    if arr.size == 0:
+        return None
+    return cv2.imdecode(arr, cv2.IMREAD_COLOR)
+
+async def _process_push(svc: ServiceInfo, frame: np.ndarray, kind: str, camera_id: str,
+                        tiled: bool = False, extra: Optional[Dict[str, Any]] = None,
+                        preview: bool = False,
+                        encoder: Optional[TierEncoder] = None) -> Tuple[Dict[str, Any], Outgoing]:
+    """
+    푸시 프레임 1장: 추론 → 위험도 → 시청자 방송. InferenceBusy는 호출 쪽에서 처리.
+    타임아웃/추론 실패는 시청자에게 error를 방송하고 다시 올림 (빈 결과로 방송하지 않음).
+    preview=True면 보낸 클라이언트 회신용으로 기본 티어 주석 이미지를 항상 만든다.
+    encoder: 연결(push-ws)마다 1개를 넘겨 버퍼 재사용, 없으면 이번 프레임용으로 새로 만듦.
+    """
+    frames.register(camera_id)   # push 카메라도 스냅샷/MJPEG로 요청할 수 있게 (수요가 생기면 캐시 갱신)
+    try:
+        out = await _infer_both_forced(svc, frame, kind, caller="push", tiled=tiled)
+    except InferenceBusy:
+        raise
+    except Exception as e:
+        _broadcast({"type": "error", "camera": camera_id, "message": _infer_error(e)})
+        raise
+    fire_dets, ppe_dets = _split_detections(out)
+    all_dets = fire_dets + ppe_dets
+    risk = compute_risk(all_dets)
+
+    images = await _images_for(encoder or _make_encoder(), frame, fire_dets, ppe_dets,
+                               bool(svc.fire), bool(svc.ppe),
+                               camera_id=camera_id,
+                               extra=(("annotated", watchers.default_tier),) if preview else ())
+
+    msg = _broadcast({"type": "frame", "camera": camera_id,
+                      "frame_size": [int(frame.shape[1]), int(frame.shape[0])],
+                      "detections": all_dets, "risk": risk, **(extra or {})}, images)
+    if risk["level"] in ("High", "Critical"):
+        _broadcast({"type": "alert", "camera": camera_id, "severity": risk["level"],
+                    "message": "실시간 위험 감지", "risk": risk, "detections": all_dets})
+    return risk, msg
+
+# ============================================================== 
+# 모바일 Push (HTTP) — raw image/jpeg | multipart | dataURL JSON(iOS 폴백, 기존 호환)
+# ==============================================================
+_DATAURL_PREFIX = "data:image/jpeg;base64,"
 
 class PushBody(BaseModel):
     image: str                 # "data:image/jpeg;base64,...."
     kind: str = "both"         # "fire" | "ppe" | "both" | "fire/smoke"
+    tiled: bool = False
+    camera_id: str = PUSH_DEFAULT_CAMERA
 
 @router.post("/push")
-async def push_frame_http(body: PushBody):
-    """모바일이 dataURL(JPEG)을 HTTP POST로 푸시"""
-    svc: YoloService = get_service()
-    kind = "fire" if body.kind.lower() == "fire/smoke" else body.kind.lower()
-
-    m = _DATAURL_RE.match(body.image or "")
-    if not m:
-        raise HTTPException(400, "invalid dataURL")
-
-    b = base64.b64decode(m.group(1))
-    arr = np.frombuffer(b, np.uint8)
-    frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
+async def push_frame_http(
+    request: Request,
+    camera_id: str = PUSH_DEFAULT_CAMERA,
+    kind: str = "both",
+    tiled: bool = False,
+):
+    """
+    모바일 프레임 푸시. Content-Type 별로:
+      image/jpeg          → 본문이 JPEG 그대로 (옵션은 쿼리: ?camera_id=&kind=&tiled=)
+      multipart/form-data → 파일 필드 "image"(또는 "file"), 옵션은 쿼리 또는 폼 필드
+      application/json    → {"image": dataURL, "kind": ...} (기존 방식)
+    """
+    svc: ServiceInfo = get_service_info()
+    ctype = (request.headers.get("content-type") or "").split(";")[0].strip().lower()
+
+    if ctype in ("image/jpeg", "image/jpg", "application/octet-stream"):
+        raw: Any = await request.body()
+    elif ctype == "multipart/form-data":
+        form = await request.form()
+        up = form.get("image") or form.get("file")
+        if up is None or isinstance(up, str):
+            raise HTTPException(400, "missing image file field")
+        raw = await up.read()
+        camera_id = str(form.get("camera_id") or camera_id)
+        kind = str(form.get("kind") or kind)
+        tiled = str(form.get("tiled") or tiled).lower() in ("1", "true", "yes")
+    else:
+        try:
+            body = PushBody(**(await request.json()))
+        except Exception:
+            raise HTTPException(400, "invalid push body")
+        data = body.image or ""
+        # 수 MB 문자열에 정규식을 돌리지 않고 접두어만 확인
+        if data[:len(_DATAURL_PREFIX)].lower() != _DATAURL_PREFIX:
+            raise HTTPException(400, "invalid dataURL")
+        try:
+            raw = base64.b64decode(memoryview(data.encode("ascii"))[len(_DATAURL_PREFIX):])
+        except ValueError:
+            raise HTTPException(400, "invalid dataURL")
+        camera_id, kind, tiled = body.camera_id, body.kind, body.tiled
+
+    frame = await asyncio.to_thread(_decode_jpeg, raw)
     if frame is None:
         raise HTTPException(400, "decode failed")
 
-    out = _infer_both_forced(svc, frame, kind)
-    fire_dets, ppe_dets = _split_detections(out)
-    all_dets = fire_dets + ppe_dets
-    risk = compute_risk(all_dets)
-
-    view = _render_overlay(frame, fire_dets, ppe_dets,
-                           bool(getattr(svc, "fire", None)),
-                           bool(getattr(svc, "ppe", None)))
-    data_url = _encode_data_url(view)
-
-    await _broadcast({"type": "frame", "image": data_url, "detections": all_dets, "risk": risk})
-    if risk["level"] in ("High", "Critical"):
-        await _broadcast({"type": "alert", "severity": risk["level"], "message": "실시간 위험 감지", "risk": risk})
-
-    return {"ok": True, "risk": risk}
+    try:
+        risk, _ = await _process_push(svc, frame, _norm_kind(kind), camera_id, tiled=tiled)
+    except InferenceBusy as e:
+        raise HTTPException(503, str(e))
+    except asyncio.TimeoutError:
+        raise HTTPException(504, "inference timed out")
+    return {"ok": True, "camera_id": camera_id, "risk": risk}
 
 # ============================================================== 
 # 모바일 Push (WebSocket: 바이너리 JPEG) — 고성능
 # ==============================================================
+def _parse_push_message(data: bytes, defaults: Dict[str, Any]) -> Tuple[Dict[str, Any], memoryview]:
+    """
+    바이너리 메시지 → (헤더, JPEG 뷰).
+      - JPEG 그대로 (FF D8 로 시작, 기존 클라이언트)   → 헤더는 세션 기본값
+      - [uint32 BE 헤더 길이][헤더 JSON {"camera","kind","ts"}][JPEG]
+    """
+    mv = memoryview(data)
+    if data[:2] == b"\xff\xd8" or len(data) < 4:
+        return dict(defaults), mv
+    (n,) = struct.unpack_from(">I", data, 0)
+    if n > len(data) - 4:
+        raise ValueError("bad push header length")
+    header = json.loads(bytes(mv[4:4 + n]))
+    if not isinstance(header, dict):
+        raise ValueError("bad push header")
+    return {**defaults, **header}, mv[4 + n:]
+
 @router.websocket("/push-ws")
-async def ws_push(ws: WebSocket):
-    """모바일이 캔버스->JPEG 바이너리를 WebSocket으로 푸시"""
+async def ws_push(ws: WebSocket, camera_id: str = PUSH_DEFAULT_CAMERA, kind: str = "both"):
+    """
+    모바일이 캔버스->JPEG 바이너리를 WebSocket으로 푸시.
+    세션 기본값은 쿼리(?camera_id=&kind=) 또는 텍스트 메시지 {"camera":..,"kind":..} 로 지정,
+    프레임마다 바꾸려면 바이너리 헤더 사용 (_parse_push_message). "ts"(클라이언트 시각)는 회신에 그대로 돌려줌.
+
+    흐름 제어 (크레딧):
+      - 접속 직후 {"type":"flow","credit":PUSH_WS_CREDITS} → 클라이언트는 받은 크레딧만큼만 전송
+      - 프레임을 처리(또는 버림)할 때마다 {"type":"flow","credit":n, "dropped":.., ...} 로 크레딧 반환
+      - 수신 루프는 소켓을 계속 비우고 최신 프레임 1장만 보관 → 크레딧을 모르는 기존 클라이언트가
+        빨리 보내도 처리 대기열이 쌓이지 않고 오래된 프레임은 dropped 로 집계되어 보고됨
+    """
     await ws.accept()
-    svc: YoloService = get_service()
+    svc: ServiceInfo = get_service_info()
+    defaults: Dict[str, Any] = {"camera": camera_id, "kind": kind}
 
-    try:
-        while True:
-            data: bytes = await ws.receive_bytes()
+    encoder = _make_encoder()
+    flow = {"received": 0, "processed": 0, "dropped": 0, "busy": 0, "failed": 0}
+    slot: List[Tuple[Dict[str, Any], memoryview, float]] = []   # 최신 프레임 1장
+    ready = asyncio.Event()
+    returned = 0                                                # 아직 돌려주지 않은 크레딧 (버린 프레임 몫)
 
-            arr = np.frombuffer(data, np.uint8)
-            frame = cv2.imdecode(arr, cv2.IMREAD_COLOR)
-            if frame is None:
+    async def _send_flow(credit: int, **extra: Any) -> None:
+        await ws.send_text(json.dumps({"type": "flow", "credit": credit, **flow, **extra},
+                                      separators=(",", ":")))
+
+    async def _processor() -> None:
+        nonlocal returned
+        while True:
+            await ready.wait()
+            ready.clear()
+            if not slot:
+                if returned:
+                    # 처리할 프레임 없이 버린 것만 있음(잘못된 메시지) → 크레딧을 바로 반환
+                    credit, returned = returned, 0
+                    await _send_flow(credit)
                 continue
+            header, jpeg, t_recv = slot.pop()
 
-            out = _infer_both_forced(svc, frame, "both")
-            fire_dets, ppe_dets = _split_detections(out)
-            all_dets = fire_dets + ppe_dets
-            risk = compute_risk(all_dets)
+            error: Optional[str] = None
+            try:
+                frame = await asyncio.to_thread(_decode_jpeg, jpeg)
+                if frame is None:
+                    flow["dropped"] += 1
+                else:
+                    extra = {"client_ts": header["ts"]} if "ts" in header else None
+                    _, msg = await _process_push(svc, frame, _norm_kind(str(header.get("kind") or "both")),
+                                                 str(header.get("camera") or PUSH_DEFAULT_CAMERA),
+                                                 tiled=bool(header.get("tiled")), extra=extra, preview=True,
+                                                 encoder=encoder)
+                    # 보낸 클라이언트에도 회신(미리보기), 직렬화 결과 재사용
+                    await ws.send_text(msg.text("annotated", watchers.default_tier))
+                    flow["processed"] += 1
+            except InferenceBusy:
+                flow["busy"] += 1   # 포화 상태면 이 프레임은 버림
+            except Exception as e:
+                # 타임아웃/추론·인코딩 실패: 이 프레임만 실패로 알리고 처리 루프는 계속
+                flow["failed"] += 1
+                error = _infer_error(e)
+                log.warning("push-ws frame failed: %s", error)
+            if error is not None:
+                await ws.send_text(json.dumps({"type": "error", "message": error}, separators=(",", ":")))
 
-            view = _render_overlay(frame, fire_dets, ppe_dets,
-                                   bool(getattr(svc, "fire", None)),
-                                   bool(getattr(svc, "ppe", None)))
-            data_url = _encode_data_url(view)
+            credit, returned = 1 + returned, 0
+            await _send_flow(credit, server_ms=round((time.monotonic() - t_recv) * 1000, 1))
 
-            payload = {"type": "frame", "image": data_url, "detections": all_dets, "risk": risk}
-            await _broadcast(payload)     # 시청자들에게 전달
-            await ws.send_json(payload)   # 보낸 클라이언트에도 회신(미리보기)
+    # 송신은 처리 태스크만 함 (초기 크레딧은 시작 전에 보냄)
+    await _send_flow(max(1, settings.PUSH_WS_CREDITS))
+    worker = asyncio.create_task(_processor())
 
-            if risk["level"] in ("High", "Critical"):
-                await _broadcast(
-                    {
-                        "type": "alert",
-                        "severity": risk["level"],
-                        "message": "실시간 위험 감지",
-                        "risk": risk,
-                        "detections": all_dets,
-                    }
-                )
+    try:
+        while True:
+            m = await ws.receive()
+            if m.get("type") == "websocket.disconnect":
+                break
+            if worker.done():
+                break   # 처리 태스크가 (전송 실패 등으로) 끝났으면 더 받지 않고 연결 종료
+            if m.get("text") is not None:
+                try:
+                    hello = json.loads(m["text"])
+                    if isinstance(hello, dict):
+                        defaults.update({k: hello[k] for k in ("camera", "kind") if k in hello})
+                except ValueError:
+                    pass
+                continue
+            data: Optional[bytes] = m.get("bytes")
+            if not data:
+                continue
+            flow["received"] += 1
+
+            try:
+                header, jpeg = _parse_push_message(data, defaults)
+            except (ValueError, struct.error):
+                flow["dropped"] += 1
+                returned += 1
+                ready.set()   # 처리 태스크가 크레딧을 바로 돌려주도록
+                continue
+
+            if slot:
+                # 아직 처리 못 한 이전 프레임은 버리고 최신 것으로 교체
+                slot.clear()
+                flow["dropped"] += 1
+                returned += 1
+            slot.append((header, jpeg, time.monotonic()))
+            ready.set()
 
     except WebSocketDisconnect:
         pass
+    finally:
+        worker.cancel()
+        # 처리 태스크의 예외(반쯤 닫힌 소켓에 send 실패 등)를 여기서 회수 → "never retrieved" 경고 방지
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await worker
+        with contextlib.suppress(Exception):
+            await ws.close()
@@ -0,0 +1,147 @@
+# backend/app/services/batching.py
+"""
+스트림/업로드 간 마이크로 배칭.
+
+짧은 윈도우 안에 들어온 프레임을 kind("fire"|"ppe"|"both")별로 모아 모델당 한 번의 배치 predict로 실행하고
+결과를 각 호출자에게 돌려준다. 윈도우는 호출 유형(caller)별로 설정한다.
+  - settings.BATCH_WINDOW_MS = {"stream": 30, "push": 15, "upload": 5}
+  - settings.BATCH_MAX_SIZE  에 도달하면 윈도우를 기다리지 않고 즉시 실행
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..core.config import settings
+from .inference import InferenceExecutor, get_executor
+
+
+BucketKey = Tuple[str, Tuple[Tuple[str, Any], ...]]   # (kind, 추론 옵션)
+
+
+@dataclass
+class _Item:
+    img: Union[bytes, np.ndarray]
+    fut: asyncio.Future
+
+
+@dataclass
+class _Bucket:
+    items: List[_Item] = field(default_factory=list)
+    deadline: float = 0.0
+    timer: Optional[asyncio.TimerHandle] = None
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        executor: InferenceExecutor,
+        max_batch: int = 8,
+        windows_ms: Optional[Dict[str, float]] = None,
+        default_window_ms: float = 10.0,
+    ):
+        self.executor = executor
+        self.max_batch = max(1, int(max_batch))
+        self.windows_ms = dict(windows_ms or {})
+        self.default_window_ms = float(default_window_ms)
+        self._buckets: Dict[BucketKey, _Bucket] = {}
+        self._batches = 0
+        self._frames = 0
+
+    def window_of(self, caller: str) -> float:
+        """caller 유형의 배칭 윈도우(초)"""
+        return max(0.0, float(self.windows_ms.get(caller, self.default_window_ms))) / 1000.0
+
+    async def submit(self, img: Union[bytes, np.ndarray], kind: str = "both",
+                     caller: str = "stream", **opts: Any) -> Dict[str, Dict[str, Any]]:
+        """
+        프레임 1장을 배치 대기열에 넣고 결과를 기다린다.
+        반환 형태는 YoloService.infer(img, kind=kind)와 같다.
+        """
+        loop = asyncio.get_running_loop()
+        bkey: BucketKey = ((kind or "both").lower(), tuple(sorted(opts.items())))
+        bucket = self._buckets.setdefault(bkey, _Bucket())
+
+        item = _Item(img=img, fut=loop.create_future())
+        bucket.items.append(item)
+
+        deadline = loop.time() + self.window_of(caller)
+        if len(bucket.items) >= self.max_batch:
+            self._flush(bkey)
+        elif bucket.timer is None or deadline < bucket.deadline:
+            # 더 급한 caller가 들어오면 타이머를 앞당김
+            if bucket.timer is not None:
+                bucket.timer.cancel()
+            bucket.deadline = deadline
+            bucket.timer = loop.call_at(deadline, self._flush, bkey)
+
+        return await item.fut
+
+    infer = submit
+
+    def _flush(self, bkey: BucketKey) -> None:
+        bucket = self._buckets.pop(bkey, None)
+        if bucket is None or not bucket.items:
+            return
+        if bucket.timer is not None:
+            bucket.timer.cancel()
+        asyncio.get_running_loop().create_task(self._run(bkey, bucket.items))
+
+    async def _run(self, bkey: BucketKey, items: List[_Item]) -> None:
+        kind, opts = bkey
+        self._batches += 1
+        self._frames += len(items)
+        try:
+            outs = await self.executor.infer_batch([it.img for it in items], kind=kind, **dict(opts))
+        except Exception as e:
+            for it in items:
+                if not it.fut.done():
+                    it.fut.set_exception(e)
+            return
+        for it, o in zip(items, outs):
+            if not it.fut.done():
+                it.fut.set_result(o)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_batch": self.max_batch,
+            "windows_ms": self.windows_ms,
+            "batches": self._batches,
+            "frames": self._frames,
+            "avg_batch": round(self._frames / self._batches, 2) if self._batches else 0.0,
+            "waiting": sum(len(b.items) for b in self._buckets.values()),
+        }
+
+
+class _PassThrough:
+    """BATCH_ENABLED=False 일 때: 배칭 없이 바로 워커 풀로."""
+
+    def __init__(self, executor: InferenceExecutor):
+        self.executor = executor
+
+    async def submit(self, img, kind: str = "both", caller: str = "stream", **opts):
+        return await self.executor.infer(img, kind=kind, **opts)
+
+    infer = submit
+
+    def stats(self) -> Dict[str, Any]:
+        return {"enabled": False}
+
+
+_batcher: MicroBatcher | _PassThrough | None = None
+
+def get_batcher() -> MicroBatcher | _PassThrough:
+    global _batcher
+    if _batcher is None:
+        if settings.BATCH_ENABLED:
+            _batcher = MicroBatcher(
+                get_executor(),
+                max_batch=settings.BATCH_MAX_SIZE,
+                windows_ms=settings.BATCH_WINDOW_MS,
+            )
+        else:
+            _batcher = _PassThrough(get_executor())
+    return _batcher
@@ -0,0 +1,217 @@
+# backend/app/services/cameras.py
+"""
+IP 카메라(pull) 레지스트리.
+
+카메라 ID마다 감독(supervisor) 태스크 1개가 실제 pull 루프(runner)를 돌린다.
+  - start(cfg): 같은 ID가 이미 돌고 있으면 멈추고 새 설정으로 다시 시작
+  - stop(id) / stop_all() / list()
+  - runner가 예외로 끝나면(스트림 끊김, 열기 실패 등) 지수 백오프 후 재접속
+  - 추론 예산: 노드 전체 STREAM_INFER_FPS를 실행 중인 카메라 수로 나눠
+    카메라별 프레임 간격을 정함 (카메라당 최대 CAMERA_MAX_FPS)
+  - 시청자가 없는 카메라는 idle: CAMERA_IDLE_FPS로 디텍션/알림만 (렌더·인코딩 없음)
+    예산 계산에서 idle 카메라 몫을 먼저 빼고 나머지를 시청 중인 카메라끼리 나눔
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from ..core.config import settings
+
+log = logging.getLogger("app.cameras")
+
+
+@dataclass
+class CameraConfig:
+    id: str
+    url: str
+    kind: str = "both"
+    tiled: bool = False
+    roi: Any = None           # RoiMask | None (실행 중 교체 가능)
+
+
+@dataclass
+class Camera:
+    cfg: CameraConfig
+    stop_event: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+    status: str = "starting"  # starting | running | reconnecting | stopped
+    started_at: float = field(default_factory=time.time)
+    connects: int = 0
+    frames: int = 0
+    last_error: Optional[str] = None
+    capture: Any = None       # FrameGrabber (연결 중일 때)
+    gate: Any = None          # SceneGate (GATE_ENABLED일 때)
+    idle: bool = False        # 시청자 없음 → 저속 디텍션/알림만
+    wake_event: asyncio.Event = field(default_factory=asyncio.Event)
+    last_alert_at: float = 0.0
+
+    @property
+    def id(self) -> str:
+        return self.cfg.id
+
+    @property
+    def stopped(self) -> bool:
+        return self.stop_event.is_set()
+
+    async def sleep(self, sec: float) -> bool:
+        """stop 또는 wake() 되면 바로 깨어남. 멈췄으면 True."""
+        if sec > 0 and not self.stopped and not self.wake_event.is_set():
+            waits = [asyncio.ensure_future(self.stop_event.wait()),
+                     asyncio.ensure_future(self.wake_event.wait())]
+            _, pending = await asyncio.wait(waits, timeout=sec, return_when=asyncio.FIRST_COMPLETED)
+            for p in pending:
+                p.cancel()
+        self.wake_event.clear()
+        return self.stopped
+
+    def wake(self) -> None:
+        self.wake_event.set()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "url": self.cfg.url,
+            "kind": self.cfg.kind,
+            "tiled": self.cfg.tiled,
+            "roi": len(self.cfg.roi.regions) if self.cfg.roi is not None else 0,
+            "status": self.status,
+            "idle": self.idle,
+            "uptime_sec": round(time.time() - self.started_at, 1),
+            "connects": self.connects,
+            "frames": self.frames,
+            "last_error": self.last_error,
+            "capture": self.capture.stats() if self.capture is not None else None,
+            "gate": self.gate.stats() if self.gate is not None else None,
+        }
+
+
+Runner = Callable[[Camera], Awaitable[None]]
+
+
+class CameraManager:
+    def __init__(
+        self,
+        runner: Runner,
+        max_cameras: int = 32,
+        total_fps: float = 40.0,
+        max_fps: float = 10.0,
+        idle_fps: float = 1.0,
+        backoff_min: float = 1.0,
+        backoff_max: float = 30.0,
+    ):
+        self.runner = runner
+        self.max_cameras = max(1, int(max_cameras))
+        self.total_fps = float(total_fps)
+        self.max_fps = float(max_fps)
+        self.idle_fps = max(0.05, float(idle_fps))
+        self.backoff_min = float(backoff_min)
+        self.backoff_max = float(backoff_max)
+        self._cams: Dict[str, Camera] = {}
+
+    # ---- 추론 예산 ----
+    def frame_interval(self, cam: Optional[Camera] = None) -> float:
+        """
+        카메라 한 대의 프레임 간격(초).
+        idle 카메라는 idle_fps 고정, 나머지는 (전체 예산 - idle 몫)을 시청 중인 카메라 수로 나눔.
+        """
+        if cam is not None and cam.idle:
+            return 1.0 / self.idle_fps
+        idle = sum(1 for c in self._cams.values() if c.idle)
+        active = max(1, len(self._cams) - idle)
+        budget = self.total_fps - idle * self.idle_fps
+        fps = min(self.max_fps, budget / active) if self.total_fps > 0 else self.max_fps
+        return 1.0 / max(fps, 0.1)
+
+    def wake_all(self) -> None:
+        for c in self._cams.values():
+            c.wake()
+
+    # ---- 관리 ----
+    def get(self, cam_id: str) -> Optional[Camera]:
+        return self._cams.get(cam_id)
+
+    def cameras(self) -> List[Camera]:
+        return list(self._cams.values())
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [c.info() for c in self._cams.values()]
+
+    async def start(self, cfg: CameraConfig) -> Camera:
+        if cfg.id in self._cams:
+            await self.stop(cfg.id)
+        elif len(self._cams) >= self.max_cameras:
+            raise RuntimeError(f"camera limit reached ({self.max_cameras})")
+        cam = Camera(cfg=cfg)
+        cam.task = asyncio.create_task(self._supervise(cam), name=f"camera-{cfg.id}")
+        self._cams[cfg.id] = cam
+        log.info("camera %s started: %s", cfg.id, cfg.url)
+        return cam
+
+    async def stop(self, cam_id: str) -> bool:
+        cam = self._cams.pop(cam_id, None)
+        if cam is None:
+            return False
+        cam.stop_event.set()
+        if cam.task is not None:
+            try:
+                await asyncio.wait_for(cam.task, timeout=5.0)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                cam.task.cancel()
+        cam.status = "stopped"
+        log.info("camera %s stopped", cam_id)
+        return True
+
+    async def stop_all(self) -> int:
+        ids = list(self._cams)
+        for cam_id in ids:
+            await self.stop(cam_id)
+        return len(ids)
+
+    async def _supervise(self, cam: Camera) -> None:
+        """runner를 돌리고, 끊기면 백오프 후 재접속. 오래 정상 동작했으면 백오프 초기화."""
+        backoff = self.backoff_min
+        while not cam.stopped:
+            t0 = time.monotonic()
+            cam.connects += 1
+            try:
+                await self.runner(cam)
+                if cam.stopped:
+                    break
+                cam.last_error = "stream ended"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                cam.last_error = str(e) or type(e).__name__
+                log.warning("camera %s dropped: %s", cam.id, cam.last_error)
+
+            if time.monotonic() - t0 > self.backoff_max:
+                backoff = self.backoff_min
+            cam.status = "reconnecting"
+            if await cam.sleep(backoff):
+                break
+            backoff = min(self.backoff_max, backoff * 2)
+        cam.status = "stopped"
+
+
+_manager: CameraManager | None = None
+
+def get_camera_manager(runner: Optional[Runner] = None) -> CameraManager:
+    """최초 호출 시 runner(pull 루프)를 등록해서 생성"""
+    global _manager
+    if _manager is None:
+        if runner is None:
+            raise RuntimeError("camera manager not initialized")
+        _manager = CameraManager(
+            runner,
+            max_cameras=settings.CAMERA_MAX,
+            total_fps=settings.STREAM_INFER_FPS,
+            max_fps=settings.CAMERA_MAX_FPS,
+            idle_fps=settings.CAMERA_IDLE_FPS,
+            backoff_min=settings.CAMERA_RECONNECT_MIN_SEC,
+            backoff_max=settings.CAMERA_RECONNECT_MAX_SEC,
+        )
+    return _manager
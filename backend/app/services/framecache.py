@@ -0,0 +1,169 @@
+# backend/app/services/framecache.py
+"""
+카메라별 최신 프레임 캐시 (HTTP 소비자용: MJPEG, 스냅샷).
+
+NVR / 월 디스플레이 / 스크립트처럼 WebSocket 프로토콜을 못 쓰는 소비자를 위해
+방송되는 frame 메시지마다 주석 JPEG(FRAME_CACHE_TIER) + 디텍션/위험도를 카메라별로 1개만 보관.
+  - 인코딩은 생산자가 이미 한 결과를 그대로 저장 (요청마다 인코딩 없음)
+  - MJPEG 파트(바운더리 + 헤더 + JPEG)도 프레임당 1번만 만들어 모든 시청자가 같은 bytes 공유
+  - 새 프레임 대기는 카메라별 asyncio.Event 하나 → 시청자 추가 비용은 대기 1개 + 소켓 쓰기뿐
+수요: MJPEG 시청자가 있거나 최근 SNAPSHOT_HOLD_SEC 안에 스냅샷 요청이 있었던 카메라만
+생산자가 캐시용 이미지를 만든다 (wants()). 그 외에는 캐시가 갱신되지 않아도 비용 0.
+push 카메라 슬롯(register())은 클라이언트가 정한 ID라 무한히 늘 수 있으므로
+push_ttl 동안 조용하면 삭제하고, max_push를 넘으면 가장 오래 조용한 슬롯부터 삭제.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+
+from ..core.config import settings
+
+MJPEG_BOUNDARY = "frame"
+
+
+class CachedFrame:
+    __slots__ = ("seq", "etag", "jpeg", "part", "meta", "ts")
+
+    def __init__(self, seq: int, etag: str, jpeg: bytes, meta: Dict[str, Any]):
+        self.seq = seq
+        self.etag = etag
+        self.jpeg = jpeg
+        self.part = b"".join((
+            f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\nContent-Length: {len(jpeg)}\r\n\r\n".encode(),
+            jpeg,
+            b"\r\n",
+        ))
+        self.meta = meta
+        self.ts = time.time()
+
+
+class _Slot:
+    __slots__ = ("frame", "changed", "viewers", "snapshot_at", "push", "active_at")
+
+    def __init__(self, push: bool = False):
+        self.frame: Optional[CachedFrame] = None
+        self.changed = asyncio.Event()
+        self.viewers = 0          # 연결 중인 MJPEG 시청자
+        self.snapshot_at = 0.0    # 마지막 스냅샷 요청 (monotonic)
+        self.push = push          # register()로 생긴 push 카메라 슬롯 (TTL/상한 대상)
+        self.active_at = time.monotonic()   # 마지막 갱신/시청/스냅샷
+
+
+class FrameCache:
+    def __init__(self, tier: str = "full", snapshot_hold: float = 10.0,
+                 push_ttl: float = 300.0, max_push: int = 64):
+        self.tier = tier
+        self.snapshot_hold = float(snapshot_hold)
+        self.push_ttl = float(push_ttl)
+        self.max_push = max(1, int(max_push))
+        self._slots: Dict[str, _Slot] = {}
+        self._seq = 0
+        # 재시작 후 같은 seq가 나와도 ETag가 겹치지 않도록 프로세스별 접두어
+        self._boot = f"{int(time.time()):x}"
+
+    def _slot(self, camera_id: str) -> _Slot:
+        s = self._slots.get(camera_id)
+        if s is None:
+            s = self._slots[camera_id] = _Slot()
+        s.active_at = time.monotonic()
+        return s
+
+    def _prune_push(self, room: int = 0) -> None:
+        """시청자 없는 push 슬롯 중 TTL이 지난 것 삭제 + 상한(room개 자리 확보 포함) 초과분은 오래된 순으로 삭제"""
+        now = time.monotonic()
+        idle = sorted((s.active_at, cid) for cid, s in self._slots.items() if s.push and s.viewers == 0)
+        expired = [cid for t, cid in idle if now - t >= self.push_ttl]
+        rest = [cid for t, cid in idle if now - t < self.push_ttl]
+        pushes = sum(1 for s in self._slots.values() if s.push) - len(expired)
+        over = max(0, pushes + room - self.max_push)
+        for cid in expired + rest[:over]:
+            self.drop(cid)
+
+    # ---- 생산 ----
+    def wants(self, camera_id: Optional[str]) -> bool:
+        """이 카메라의 캐시용 이미지를 만들어야 하는지"""
+        s = self._slots.get(camera_id) if camera_id is not None else None
+        if s is None:
+            return False
+        return s.viewers > 0 or time.monotonic() - s.snapshot_at < self.snapshot_hold
+
+    def register(self, camera_id: str) -> None:
+        """CameraManager 밖의 소스(모바일 push)도 스냅샷/MJPEG 대상이 되도록 빈 슬롯을 만들어 둠"""
+        s = self._slots.get(camera_id)
+        if s is None:
+            self._prune_push(room=1)
+            s = self._slots[camera_id] = _Slot(push=True)
+        s.active_at = time.monotonic()
+
+    def update(self, camera_id: str, jpeg: bytes, meta: Dict[str, Any]) -> CachedFrame:
+        self._seq += 1
+        s = self._slot(camera_id)
+        s.frame = CachedFrame(self._seq, f'"{self._boot}-{self._seq}"', jpeg, meta)
+        # 기다리던 시청자를 모두 깨우고 다음 프레임용 이벤트로 교체
+        s.changed.set()
+        s.changed = asyncio.Event()
+        return s.frame
+
+    def drop(self, camera_id: str) -> None:
+        s = self._slots.pop(camera_id, None)
+        if s is not None:
+            s.changed.set()   # 대기 중인 MJPEG 시청자가 종료를 알아채도록
+
+    # ---- 소비 ----
+    def has(self, camera_id: str) -> bool:
+        return camera_id in self._slots
+
+    def latest(self, camera_id: str) -> Optional[CachedFrame]:
+        s = self._slots.get(camera_id)
+        return s.frame if s is not None else None
+
+    def touch_snapshot(self, camera_id: str) -> None:
+        self._slot(camera_id).snapshot_at = time.monotonic()
+
+    async def wait_next(self, camera_id: str, after: int, timeout: float) -> Optional[CachedFrame]:
+        """seq가 after보다 새 프레임을 기다림. timeout 이나 drop()이면 None."""
+        deadline = time.monotonic() + timeout
+        while True:
+            s = self._slots.get(camera_id)
+            if s is None:
+                return None
+            if s.frame is not None and s.frame.seq > after:
+                return s.frame
+            left = deadline - time.monotonic()
+            if left <= 0:
+                return None
+            try:
+                await asyncio.wait_for(s.changed.wait(), timeout=left)
+            except asyncio.TimeoutError:
+                return None
+
+    def attach(self, camera_id: str) -> None:
+        self._slot(camera_id).viewers += 1
+
+    def detach(self, camera_id: str) -> None:
+        s = self._slots.get(camera_id)
+        if s is not None and s.viewers > 0:
+            s.viewers -= 1
+            s.active_at = time.monotonic()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        self._prune_push()
+        return [{
+            "camera": cid,
+            "viewers": s.viewers,
+            "seq": s.frame.seq if s.frame is not None else None,
+            "bytes": len(s.frame.jpeg) if s.frame is not None else 0,
+            "age_sec": round(time.time() - s.frame.ts, 1) if s.frame is not None else None,
+        } for cid, s in self._slots.items()]
+
+
+_cache: FrameCache | None = None
+
+def get_frame_cache() -> FrameCache:
+    global _cache
+    if _cache is None:
+        _cache = FrameCache(tier=settings.FRAME_CACHE_TIER, snapshot_hold=settings.SNAPSHOT_HOLD_SEC,
+                            push_ttl=settings.FRAME_CACHE_PUSH_TTL_SEC, max_push=settings.FRAME_CACHE_MAX_PUSH)
+    return _cache
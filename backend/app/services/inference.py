@@ -0,0 +1,329 @@
+# backend/app/services/inference.py
+"""
+YOLO 추론 워커 풀.
+
+라우터(async)에서 YoloService.infer를 직접 부르면 CPU 추론 동안 이벤트 루프 전체가 멈춘다.
+여기서는 thread/process 풀에 추론을 넘기고 await 하도록 감싼다.
+  - 대기열 상한(INFER_MAX_QUEUE) 초과 시 InferenceBusy
+  - 요청당 타임아웃(INFER_TIMEOUT_SEC) 초과 시 asyncio.TimeoutError
+  - stats()로 대기열 깊이 확인 (/detect/health 에 노출)
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing as mp
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from ..core.config import settings
+from ..utils.engines import engine_for, normalize_engine
+from ..utils.vision import YoloService, load_labels, service_fingerprint, set_intra_op_threads
+
+log = logging.getLogger("app.inference")
+
+
+# -----------------------------
+# YoloService 생성/싱글톤
+# -----------------------------
+def _check_weights() -> None:
+    def _must_exist(p: str | None, name: str):
+        if p and not Path(p).exists():
+            raise RuntimeError(f"{name} weights not found: {p}")
+
+    _must_exist(settings.YOLO_FIRE_SMOKE_WEIGHTS, "Fire/Smoke")
+    _must_exist(settings.YOLO_PPE_WEIGHTS, "PPE")
+
+def build_service() -> YoloService:
+    """settings 기준으로 새 YoloService 생성 (워커마다 별도 인스턴스 필요)."""
+    _check_weights()
+
+    return YoloService(
+        settings.YOLO_FIRE_SMOKE_WEIGHTS,
+        settings.YOLO_PPE_WEIGHTS,
+        fire_labels_json=getattr(settings, "YOLO_FIRE_SMOKE_LABELS_JSON", ""),
+        ppe_labels_json=getattr(settings, "YOLO_PPE_LABELS_JSON", ""),
+        default_conf=getattr(settings, "YOLO_DEFAULT_CONF", 0.25),
+        parallel_models=settings.YOLO_PARALLEL_MODELS,
+        model_threads=settings.YOLO_MODEL_THREADS or _model_threads_default(),
+        engine=settings.YOLO_ENGINE,
+        imgsz=settings.YOLO_IMGSZ,
+        onnx_cache_dir=settings.ONNX_CACHE_DIR,
+        fire_precision=settings.YOLO_FIRE_SMOKE_PRECISION,
+        ppe_precision=settings.YOLO_PPE_PRECISION,
+        tile_size=settings.TILE_SIZE,
+        tile_overlap=settings.TILE_OVERLAP,
+        tile_merge_ios=settings.TILE_MERGE_IOS,
+        tile_full_frame=settings.TILE_FULL_FRAME,
+        tile_workers=settings.TILE_WORKERS,
+        tile_batch=settings.TILE_BATCH_MAX,
+    )
+
+
+@dataclass(frozen=True)
+class ServiceInfo:
+    """
+    라우터 프로세스용 모델 정보. 모델은 워커에서만 로드하고, 여기서는 settings/가중치 메타만 본다.
+    fire/ppe: 해당 모델 가중치가 설정돼 있는지 (YoloService.fire/ppe 와 같은 의미로 truthiness 사용)
+    version:  YoloService.version 과 같은 지문 (결과 캐시 키)
+    """
+    fire: bool
+    ppe: bool
+    fire_weights: Optional[str]
+    ppe_weights: Optional[str]
+    fire_precision: Optional[str]
+    ppe_precision: Optional[str]
+    engine: str
+    version: str
+
+
+def _describe_service() -> ServiceInfo:
+    _check_weights()
+    fire_w = settings.YOLO_FIRE_SMOKE_WEIGHTS or None
+    ppe_w = settings.YOLO_PPE_WEIGHTS or None
+    fire_p = settings.YOLO_FIRE_SMOKE_PRECISION if fire_w else None
+    ppe_p = settings.YOLO_PPE_PRECISION if ppe_w else None
+    engine = normalize_engine(settings.YOLO_ENGINE)
+    version = service_fingerprint(
+        engine, int(settings.YOLO_IMGSZ), float(getattr(settings, "YOLO_DEFAULT_CONF", 0.25)),
+        fire=(fire_w, fire_p, load_labels(getattr(settings, "YOLO_FIRE_SMOKE_LABELS_JSON", ""))),
+        ppe=(ppe_w, ppe_p, load_labels(getattr(settings, "YOLO_PPE_LABELS_JSON", ""))),
+        tile=[int(settings.TILE_SIZE), float(settings.TILE_OVERLAP), float(settings.TILE_MERGE_IOS),
+              bool(settings.TILE_FULL_FRAME)],
+    )
+    return ServiceInfo(bool(fire_w), bool(ppe_w), fire_w, ppe_w, fire_p, ppe_p, engine, version)
+
+
+_info: ServiceInfo | None = None
+
+def get_service_info() -> ServiceInfo:
+    """모델 설정 정보 (1회 계산). 라우터 프로세스에는 YoloService를 만들지 않는다."""
+    global _info
+    if _info is None:
+        _info = _describe_service()
+    return _info
+
+
+# -----------------------------
+# 워커 측 (thread/process 공통)
+# -----------------------------
+# ultralytics predictor는 스레드 안전하지 않으므로 워커 스레드(프로세스)마다 모델을 따로 가진다.
+_local = threading.local()
+
+def _intra_op_default() -> int:
+    """워커 하나가 쓸 수 있는 코어 수 (INFER_INTRA_OP_THREADS 미설정 시 코어/워커)."""
+    if settings.INFER_INTRA_OP_THREADS > 0:
+        return settings.INFER_INTRA_OP_THREADS
+    cpu = os.cpu_count() or 1
+    workers = settings.INFER_WORKERS if settings.INFER_WORKERS > 0 else max(1, cpu // 2)
+    return max(1, cpu // workers)
+
+def _model_threads_default() -> int:
+    """모델 하나가 쓸 스레드 수: 두 모델이 동시에 돌면 워커 예산의 절반, 순차면 전부."""
+    budget = _intra_op_default()
+    return max(1, budget // 2) if settings.YOLO_PARALLEL_MODELS else budget
+
+def _uses_torch() -> bool:
+    """설정된 모델 중 ultralytics(PyTorch) 엔진으로 로드될 것이 있는지 (int8은 엔진 설정과 무관하게 ONNX)"""
+    return any(w and engine_for(settings.YOLO_ENGINE, p) == "ultralytics"
+               for w, p in ((settings.YOLO_FIRE_SMOKE_WEIGHTS, settings.YOLO_FIRE_SMOKE_PRECISION),
+                            (settings.YOLO_PPE_WEIGHTS, settings.YOLO_PPE_PRECISION)))
+
+def _init_worker(intra_op_threads: int) -> None:
+    """워커 시작 시 torch intra-op 스레드 수를 제한해 코어 과다 구독을 막는다 (torch 엔진 모델이 없으면 torch를 건드리지 않음)."""
+    if intra_op_threads <= 0:
+        return
+    if _uses_torch():
+        set_intra_op_threads(intra_op_threads)
+    try:
+        import cv2
+        cv2.setNumThreads(1)
+    except Exception:
+        pass
+
+def _worker_service() -> YoloService:
+    svc = getattr(_local, "svc", None)
+    if svc is None:
+        svc = build_service()
+        _local.svc = svc
+    return svc
+
+def _worker_infer(img: Union[bytes, np.ndarray], kind: str, opts: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    return _worker_service().infer(img, kind=kind, **opts)
+
+def _worker_warmup(sizes: List[Tuple[int, int]], batch_sizes: List[int], runs: int) -> Dict[str, Any]:
+    """워커별 모델 로드 + 더미 프레임 추론 (첫 predict의 느린 초기화를 미리 치름)."""
+    t0 = time.perf_counter()
+    svc = _worker_service()
+    t1 = time.perf_counter()
+    for w, h in sizes:
+        for b in batch_sizes:
+            frames = [np.zeros((h, w, 3), dtype=np.uint8)] * b
+            for _ in range(runs):
+                svc.infer_batch(frames, kind="both", output="both")
+    t2 = time.perf_counter()
+    return {
+        "worker": f"{os.getpid()}/{threading.current_thread().name}",
+        "load_ms": round((t1 - t0) * 1000, 1),
+        "warmup_ms": round((t2 - t1) * 1000, 1),
+    }
+
+def _worker_infer_batch(imgs: List[Union[bytes, np.ndarray]], kind: str,
+                        opts: Dict[str, Any]) -> List[Dict[str, Dict[str, Any]]]:
+    return _worker_service().infer_batch(imgs, kind=kind, **opts)
+
+
+# -----------------------------
+# Executor
+# -----------------------------
+class InferenceBusy(RuntimeError):
+    """대기열이 가득 차 요청을 받을 수 없음."""
+
+
+class InferenceExecutor:
+    def __init__(
+        self,
+        mode: str = "thread",
+        workers: int = 0,
+        max_queue: int = 64,
+        timeout: float = 10.0,
+        intra_op_threads: int = 0,
+    ):
+        cpu = os.cpu_count() or 1
+        self.mode = "process" if (mode or "").lower() == "process" else "thread"
+        self.workers = workers if workers > 0 else max(1, cpu // 2)
+        self.intra_op_threads = intra_op_threads if intra_op_threads > 0 else max(1, cpu // self.workers)
+        self.max_queue = max(1, int(max_queue))
+        self.timeout = float(timeout)
+
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0      # 제출됐지만 끝나지 않은 작업 수 (대기 + 실행)
+        self._completed = 0
+        self._rejected = 0
+        self._timeouts = 0
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                # fork + torch 스레드 조합은 교착 위험이 있어 spawn 사용
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.intra_op_threads,),
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix="infer",
+                    initializer=_init_worker,
+                    initargs=(self.intra_op_threads,),
+                )
+            log.info("inference pool started: mode=%s workers=%d intra_op=%d",
+                     self.mode, self.workers, self.intra_op_threads)
+        return self._pool
+
+    def _done(self, _fut) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    async def _call(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None) -> Any:
+        """fn(*args)를 워커 풀에서 실행하고 결과를 await (대기열 상한/타임아웃 적용)."""
+        with self._lock:
+            if self._pending >= self.max_queue:
+                self._rejected += 1
+                raise InferenceBusy(f"inference queue full ({self._pending}/{self.max_queue})")
+            self._pending += 1
+
+        try:
+            cfut = self._get_pool().submit(fn, *args)
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        # 타임아웃으로 호출자가 먼저 빠져나가도 실제 작업이 끝날 때 카운트가 줄어든다
+        cfut.add_done_callback(self._done)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(cfut), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timeouts += 1
+            raise
+
+    async def infer(
+        self,
+        img: Union[bytes, np.ndarray],
+        kind: str = "both",
+        timeout: Optional[float] = None,
+        **opts: Any,
+    ) -> Dict[str, Dict[str, Any]]:
+        """워커 풀에서 YoloService.infer 실행 후 결과를 await."""
+        return await self._call(_worker_infer, img, kind, opts, timeout=timeout)
+
+    async def infer_batch(
+        self,
+        imgs: List[Union[bytes, np.ndarray]],
+        kind: str = "both",
+        timeout: Optional[float] = None,
+        **opts: Any,
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """워커 풀에서 YoloService.infer_batch 실행 (배치 전체가 대기열 1칸)."""
+        return await self._call(_worker_infer_batch, imgs, kind, opts, timeout=timeout)
+
+    async def warmup(self, sizes: List[Tuple[int, int]], batch_sizes: List[int],
+                     runs: int = 1) -> List[Dict[str, Any]]:
+        """
+        워커 수만큼 워밍업 작업을 한꺼번에 제출 → 각 워커가 모델 로드 + 더미 추론.
+        (모든 작업이 동시에 걸려 있으므로 풀은 워커를 최대치까지 띄운다)
+        대기열 상한/타임아웃은 적용하지 않는다.
+        """
+        pool = self._get_pool()
+        futs = [asyncio.wrap_future(pool.submit(_worker_warmup, sizes, batch_sizes, runs))
+                for _ in range(self.workers)]
+        return list(await asyncio.gather(*futs))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending = self._pending
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "intra_op_threads": self.intra_op_threads,
+                "max_queue": self.max_queue,
+                "pending": pending,
+                "queued": max(0, pending - self.workers),
+                "running": min(pending, self.workers),
+                "completed": self._completed,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+            }
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_executor: InferenceExecutor | None = None
+
+def get_executor() -> InferenceExecutor:
+    global _executor
+    if _executor is None:
+        _executor = InferenceExecutor(
+            mode=settings.INFER_EXECUTOR,
+            workers=settings.INFER_WORKERS,
+            max_queue=settings.INFER_MAX_QUEUE,
+            timeout=settings.INFER_TIMEOUT_SEC,
+            intra_op_threads=settings.INFER_INTRA_OP_THREADS,
+        )
+    return _executor
@@ -0,0 +1,92 @@
+# backend/app/services/lifecycle.py
+"""
+앱 기동 시 모델 로드 + 워밍업, 준비 상태(readiness) 관리.
+
+  - app.main lifespan 에서 warm_start()를 백그라운드로 실행
+  - 끝나기 전까지 /health/ready 는 503 → 로드밸런서가 콜드 워커로 트래픽을 보내지 않음
+  - /health/live 는 프로세스가 살아 있으면 항상 200
+  - 단계별 소요 시간(ms)을 기록해서 느린 콜드 스타트를 확인할 수 있게 함
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Tuple
+
+from ..core.config import settings
+from .inference import get_executor, get_service_info
+from .result_cache import get_result_cache
+
+log = logging.getLogger("app.lifecycle")
+
+state: Dict[str, Any] = {
+    "ready": False,
+    "phase": "starting",
+    "phases_ms": {},
+    "workers": [],
+    "error": None,
+}
+
+
+@contextmanager
+def _phase(name: str):
+    state["phase"] = name
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        ms = round((time.perf_counter() - t0) * 1000, 1)
+        state["phases_ms"][name] = ms
+        log.info("startup phase %s: %.1f ms", name, ms)
+
+
+def _parse_sizes(sizes: List[str]) -> List[Tuple[int, int]]:
+    """["1280x720", "1920x1080"] → [(1280, 720), (1920, 1080)]"""
+    out: List[Tuple[int, int]] = []
+    for s in sizes:
+        try:
+            w, h = str(s).lower().split("x")
+            out.append((int(w), int(h)))
+        except ValueError:
+            log.warning("invalid WARMUP_FRAME_SIZES entry: %r", s)
+    return out or [(settings.YOLO_IMGSZ, settings.YOLO_IMGSZ)]
+
+
+async def warm_start() -> None:
+    """모든 설정 모델 로드 → 워커별 워밍업 → ready=True"""
+    t0 = time.perf_counter()
+    try:
+        # 라우터는 모델을 갖지 않음: 설정/가중치 확인 후 워커마다 모델 로드
+        with _phase("load_models"):
+            svc = await asyncio.to_thread(get_service_info)
+            if not settings.WARMUP_ENABLED:
+                state["workers"] = await get_executor().warmup([], [], 0)
+
+        # 모델 버전이 바뀌었으면 옛 결과 캐시 디스크 트리를 여기서 정리 (첫 요청이 rmtree를 떠안지 않게)
+        cache = get_result_cache()
+        if cache is not None:
+            with _phase("result_cache"):
+                await asyncio.to_thread(cache.use_version, svc.version)
+
+        if settings.WARMUP_ENABLED:
+            sizes = _parse_sizes(settings.WARMUP_FRAME_SIZES)
+            batch_sizes = sorted({1, max(1, settings.BATCH_MAX_SIZE if settings.BATCH_ENABLED else 1)})
+            with _phase("warmup_workers"):
+                state["workers"] = await get_executor().warmup(sizes, batch_sizes, settings.WARMUP_RUNS)
+
+        state["phases_ms"]["total"] = round((time.perf_counter() - t0) * 1000, 1)
+        state["phase"] = "ready"
+        state["ready"] = True
+        log.info("startup complete in %.1f ms", state["phases_ms"]["total"])
+    except Exception as e:
+        state["phase"] = "failed"
+        state["error"] = str(e)
+        log.exception("startup failed")
+
+
+def shutdown() -> None:
+    state["ready"] = False
+    state["phase"] = "stopping"
+    get_executor().shutdown()
@@ -0,0 +1,139 @@
+# backend/app/services/result_cache.py
+"""
+/detect/image 결과 캐시 (이미지 내용 해시 기준).
+
+같은 사진을 다시 올리면(타임아웃 재시도, 미리보기 후 publish 등) 추론/파일 저장 없이
+이전 응답(디텍션, 위험도, 원본/주석 URL)을 그대로 돌려준다.
+  - 키: sha256(파일 바이트) + 모델 kind
+  - 버전: YoloService.version (가중치/라벨 임계치/엔진 설정 해시) → 바뀌면 자동으로 미스
+  - 1차: 메모리 LRU (RESULT_CACHE_MAX_ENTRIES)
+  - 2차: 디스크 JSON (RESULT_CACHE_DIR/<version>/..) → 재시작 후에도 유지
+디스크를 만지는 get/put/use_version은 동기 함수 → 이벤트 루프에서는 asyncio.to_thread로 호출.
+버전 전환(옛 버전 디스크 캐시 삭제)은 기동 시 lifecycle.warm_start에서 미리 끝내 둔다.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from ..core.config import settings
+
+log = logging.getLogger("app.result_cache")
+
+
+def content_key(raw: bytes, kind: str) -> str:
+    return f"{hashlib.sha256(raw).hexdigest()}_{kind}"
+
+
+class ResultCache:
+    def __init__(self, disk_dir: Optional[str], max_entries: int = 512, upload_dir: str = "uploads"):
+        self.max_entries = max(1, int(max_entries))
+        self.disk_root = Path(disk_dir) if disk_dir else None
+        self.upload_dir = Path(upload_dir)
+        self._mem: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self.hits = 0
+        self.misses = 0
+
+    # ---- 버전 관리 ----
+    def use_version(self, version: str) -> None:
+        """모델 버전이 바뀌면 메모리 비우고, 다른 버전의 디스크 캐시는 삭제."""
+        if version == self._version:
+            return
+        with self._lock:
+            self._mem.clear()
+            self._version = version
+        if self.disk_root is not None and self.disk_root.exists():
+            for d in self.disk_root.iterdir():
+                if d.is_dir() and d.name != version:
+                    shutil.rmtree(d, ignore_errors=True)
+                    log.info("dropped stale result cache %s", d.name)
+
+    def _disk_path(self, key: str) -> Optional[Path]:
+        if self.disk_root is None or self._version is None:
+            return None
+        return self.disk_root / self._version / f"{key}.json"
+
+    def _files_exist(self, resp: Dict[str, Any]) -> bool:
+        """저장된 원본/주석 파일이 지워졌으면 캐시 무효"""
+        urls = [resp.get("original_url")] + list((resp.get("annotated") or {}).values())
+        for u in urls:
+            if not u or not str(u).startswith("/uploads/"):
+                return False
+            if not (self.upload_dir / str(u)[len("/uploads/"):]).exists():
+                return False
+        return True
+
+    # ---- 조회/저장 ----
+    def get(self, key: str, version: str) -> Optional[Dict[str, Any]]:
+        self.use_version(version)
+        with self._lock:
+            resp = self._mem.get(key)
+            if resp is not None:
+                self._mem.move_to_end(key)
+
+        if resp is None:
+            path = self._disk_path(key)
+            if path is not None and path.exists():
+                try:
+                    resp = json.loads(path.read_text(encoding="utf-8"))
+                except (OSError, ValueError):
+                    resp = None
+
+        if resp is None or not self._files_exist(resp):
+            self.misses += 1
+            return None
+
+        self._remember(key, resp)
+        self.hits += 1
+        return resp
+
+    def put(self, key: str, version: str, resp: Dict[str, Any]) -> None:
+        self.use_version(version)
+        self._remember(key, resp)
+        path = self._disk_path(key)
+        if path is None:
+            return
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(resp, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, path)  # 원자적 교체
+        except OSError:
+            log.exception("result cache write failed")
+
+    def _remember(self, key: str, resp: Dict[str, Any]) -> None:
+        with self._lock:
+            self._mem[key] = resp
+            self._mem.move_to_end(key)
+            while len(self._mem) > self.max_entries:
+                self._mem.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self._version,
+            "entries": len(self._mem),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_cache: ResultCache | None = None
+
+def get_result_cache() -> Optional[ResultCache]:
+    global _cache
+    if not settings.RESULT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = ResultCache(settings.RESULT_CACHE_DIR or None, settings.RESULT_CACHE_MAX_ENTRIES,
+                             upload_dir=settings.UPLOAD_DIR)
+    return _cache
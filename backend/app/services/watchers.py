@@ -0,0 +1,366 @@
+# backend/app/services/watchers.py
+"""
+시청자(WebSocket) 팬아웃.
+
+토픽 구독: 시청자는 카메라 ID 목록(없으면 전체)과 메시지 종류(frames / alerts / stats)를 고른다.
+  - 토픽 색인 {(카메라 ID | "*", 종류): 시청자 집합} → publish는 그 토픽 구독자만 순회 (O(구독자 수))
+  - error 메시지는 해당 카메라의 alerts 구독자에게 감
+  - 카메라 수요(modes_for / demand_for)도 그 카메라 frames 구독자만으로 계산 → 안 보는 카메라는 idle
+
+시청자마다 크기 제한 송신 큐 + 전용 writer 태스크를 둔다.
+  - publish(msg): 구독자 큐에 넣기만 함 (네트워크 대기 없음)
+  - 큐가 차면 가장 오래된 frame/stats 메시지를 버림. alert/error 는 절대 버리지 않음
+  - 연속으로 WATCHER_MAX_DROPS 개를 버리거나 한 번 보내는 데 WATCHER_SEND_TIMEOUT_SEC 를 넘기면
+    느린 시청자로 보고 연결을 끊음 → 느린 모바일 1대가 다른 시청자/카메라 루프를 막지 않는다
+
+전송 형식 (시청자가 접속 시 선택, 메시지당 형식별로 1번만 직렬화해서 모든 시청자가 같은 객체 공유):
+  - "json"   (기본, 기존 호환): {"type": "frame", ..., "image": "data:image/jpeg;base64,..."} 텍스트
+  - "binary": [헤더 길이 uint32 BE][헤더 JSON UTF-8][JPEG 원본 바이트]  (이미지 없는 메시지는 헤더만)
+
+구독 모드 (받을 이미지 종류):
+  - "annotated" (기본): 서버가 박스를 그린 JPEG
+  - "raw":  원본 프레임 JPEG + 디텍션 (클라이언트가 직접 그림)
+  - "meta": 디텍션/위험도만, 이미지 없음 (알림 콘솔 등)
+생산자는 demand_for()로 실제 필요한 이미지만 렌더/인코딩한다.
+
+품질 티어 (STREAM_TIERS, 예: full/high/medium/low): 시청자가 접속 시 최대 티어를 고르고,
+큐가 밀려 frame을 버리게 되면 한 단계씩 자동으로 낮춤. 큐가 계속 비어 있으면
+WATCHER_TIER_RECOVER_SENDS 번 전송마다 한 단계씩 요청 티어까지 복구.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import json
+import logging
+import struct
+from collections import deque
+from itertools import chain
+from typing import (Any, Callable, Collection, Deque, Dict, FrozenSet, Iterable, List, Optional,
+                    Sequence, Set, Tuple, Union)
+
+from fastapi import WebSocket
+
+from ..core.config import settings
+
+log = logging.getLogger("app.watchers")
+
+
+FORMATS = ("json", "binary")
+MODES = ("annotated", "raw", "meta")
+TOPICS = ("frames", "alerts", "stats")
+DEFAULT_TOPICS = ("frames", "alerts")    # 기존 클라이언트 호환 (stats는 명시적으로 구독)
+ANY_CAMERA = "*"
+# 메시지 type → 토픽
+TYPE_TOPICS = {"frame": "frames", "alert": "alerts", "error": "alerts", "stats": "stats"}
+DROPPABLE_TYPES = ("frame", "stats")     # 최신 것만 의미 있는 메시지
+KEEP: Any = object()                     # subscribe(): 이 항목은 현재 구독 유지
+
+
+def normalize_topics(topics: Optional[Iterable[str]]) -> FrozenSet[str]:
+    picked = frozenset(t for t in (topics or ()) if t in TOPICS)
+    return picked or frozenset(DEFAULT_TOPICS)
+
+
+def normalize_cameras(cameras: Optional[Iterable[str]]) -> Optional[FrozenSet[str]]:
+    """None / 빈 목록 / "*" 포함이면 전체 카메라(None)"""
+    picked = frozenset(str(c) for c in (cameras or ()) if str(c))
+    if not picked or ANY_CAMERA in picked:
+        return None
+    return picked
+
+
+ImageKey = Tuple[str, str]   # (모드, 티어)
+
+
+class Outgoing:
+    """
+    방송 메시지 1개. (형식, 모드, 티어)별 직렬화 결과를 캐시해서 시청자 수와 무관하게 1회만 인코딩.
+    images: {(모드, 티어): JPEG} 중 생산자가 만든 것만.
+    """
+    __slots__ = ("meta", "images", "_cache")
+
+    def __init__(self, meta: Dict[str, Any], images: Optional[Dict[ImageKey, bytes]] = None):
+        self.meta = meta
+        self.images = images or {}
+        self._cache: Dict[Tuple[str, str, str], Union[str, bytes]] = {}
+
+    @property
+    def type(self) -> Optional[str]:
+        return self.meta.get("type")
+
+    def _image(self, mode: str, tier: str) -> Optional[bytes]:
+        """요청 티어가 없으면(생산 후 시청자 티어가 바뀐 경우) 같은 모드의 다른 티어로 대체"""
+        jpeg = self.images.get((mode, tier))
+        if jpeg is None:
+            jpeg = next((v for (m, _), v in self.images.items() if m == mode), None)
+        return jpeg
+
+    def text(self, mode: str = "annotated", tier: str = "full") -> str:
+        key = ("json", mode, tier)
+        if key not in self._cache:
+            payload = self.meta
+            jpeg = self._image(mode, tier)
+            if jpeg is not None:
+                payload = {**self.meta, "image": "data:image/jpeg;base64," + base64.b64encode(jpeg).decode()}
+            self._cache[key] = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+        return self._cache[key]
+
+    def binary(self, mode: str = "annotated", tier: str = "full") -> bytes:
+        key = ("binary", mode, tier)
+        if key not in self._cache:
+            header = json.dumps(self.meta, ensure_ascii=False, separators=(",", ":")).encode()
+            self._cache[key] = b"".join((struct.pack(">I", len(header)), header, self._image(mode, tier) or b""))
+        return self._cache[key]
+
+    async def send(self, ws: WebSocket, fmt: str, mode: str, tier: str) -> None:
+        if fmt == "binary":
+            await ws.send_bytes(self.binary(mode, tier))
+        else:
+            await ws.send_text(self.text(mode, tier))
+
+
+class Watcher:
+    def __init__(self, ws: WebSocket, hub: "WatcherHub", max_queue: int = 4,
+                 send_timeout: float = 5.0, max_drops: int = 100, fmt: str = "json",
+                 mode: str = "annotated", tiers: Sequence[str] = ("full",), tier: Optional[str] = None,
+                 recover_sends: int = 50, cameras: Optional[Iterable[str]] = None,
+                 topics: Optional[Iterable[str]] = None):
+        self.ws = ws
+        self.fmt = fmt if fmt in FORMATS else "json"
+        self.mode = mode if mode in MODES else "annotated"
+        self.cameras = normalize_cameras(cameras)   # None = 전체 카메라
+        self.topics = normalize_topics(topics)
+        # 티어는 품질 높은 순. level = 현재 티어 인덱스, tier_floor = 요청한(최고) 티어 인덱스
+        self.tiers = list(tiers) or ["full"]
+        self.tier_floor = self.tiers.index(tier) if tier in self.tiers else 0
+        self.level = self.tier_floor
+        self.recover_sends = max(1, int(recover_sends))
+        self._good_sends = 0
+        self.step_downs = 0
+        self.hub = hub
+        self.max_queue = max(1, int(max_queue))
+        self.send_timeout = float(send_timeout)
+        self.max_drops = max(1, int(max_drops))
+
+        self._q: Deque[Tuple[Outgoing, bool]] = deque()   # (메시지, 버려도 되는지)
+        self._frames = 0                                  # 큐 안의 버릴 수 있는 메시지 수
+        self._wake = asyncio.Event()
+        self._drops_in_row = 0
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        self.sent = 0
+        self.dropped = 0
+
+    @property
+    def tier(self) -> str:
+        return self.tiers[self.level]
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """토픽 색인 키 (카메라 ID | "*", 토픽)"""
+        cams = self.cameras if self.cameras is not None else (ANY_CAMERA,)
+        return [(c, t) for c in cams for t in self.topics]
+
+    def _step_down(self) -> None:
+        self._good_sends = 0
+        if self.level < len(self.tiers) - 1:
+            self.level += 1
+            self.step_downs += 1
+
+    def start(self) -> "Watcher":
+        self.task = asyncio.create_task(self._writer())
+        return self
+
+    def offer(self, msg: Outgoing, droppable: bool) -> None:
+        """큐에 넣기만 한다 (await 없음)"""
+        if self.closed:
+            return
+        if droppable and self._frames >= self.max_queue:
+            # 가장 오래된 frame 하나 제거 (alert는 남김)
+            for i, (_, d) in enumerate(self._q):
+                if d:
+                    del self._q[i]
+                    break
+            self._frames -= 1
+            self.dropped += 1
+            self._drops_in_row += 1
+            self._step_down()   # 따라오지 못하면 더 가벼운 티어로
+            if self._drops_in_row >= self.max_drops:
+                self.close("too slow")
+                return
+        self._q.append((msg, droppable))
+        if droppable:
+            self._frames += 1
+        self._wake.set()
+
+    def close(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.close_reason = reason
+        self._wake.set()
+
+    async def _writer(self) -> None:
+        try:
+            while not self.closed:
+                if not self._q:
+                    self._wake.clear()
+                    await self._wake.wait()
+                    continue
+                msg, droppable = self._q.popleft()
+                if droppable:
+                    self._frames -= 1
+                await asyncio.wait_for(msg.send(self.ws, self.fmt, self.mode, self.tier),
+                                       timeout=self.send_timeout)
+                self.sent += 1
+                self._drops_in_row = 0
+                if not self._q and self.level > self.tier_floor:
+                    self._good_sends += 1
+                    if self._good_sends >= self.recover_sends:
+                        self.level -= 1
+                        self._good_sends = 0
+        except asyncio.TimeoutError:
+            self.close("send timeout")
+        except Exception:
+            self.close("send failed")
+        finally:
+            self.hub.remove(self)
+            if self.close_reason in ("too slow", "send timeout"):
+                log.info("disconnecting slow watcher (%s, dropped=%d)", self.close_reason, self.dropped)
+                try:
+                    await self.ws.close(code=1008, reason=self.close_reason)
+                except Exception:
+                    pass
+
+
+class WatcherHub:
+    def __init__(self, max_queue: int = 4, send_timeout: float = 5.0, max_drops: int = 100,
+                 tiers: Sequence[str] = ("full",), default_tier: Optional[str] = None,
+                 recover_sends: int = 50):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.max_drops = max_drops
+        self.tiers = list(tiers) or ["full"]
+        self.default_tier = default_tier if default_tier in self.tiers else self.tiers[0]
+        self.recover_sends = recover_sends
+        self._watchers: Set[Watcher] = set()
+        self._index: Dict[Tuple[str, str], Set[Watcher]] = {}
+        self.disconnected_slow = 0
+        # 새 시청자 접속 시 호출 (유휴 카메라를 바로 깨우는 용도)
+        self.on_subscribe: List[Callable[[Watcher], None]] = []
+
+    def __len__(self) -> int:
+        return len(self._watchers)
+
+    def add(self, ws: WebSocket, fmt: str = "json", mode: str = "annotated",
+            tier: Optional[str] = None, cameras: Optional[Iterable[str]] = None,
+            topics: Optional[Iterable[str]] = None) -> Watcher:
+        w = Watcher(ws, self, self.max_queue, self.send_timeout, self.max_drops, fmt, mode,
+                    tiers=self.tiers, tier=tier if tier in self.tiers else self.default_tier,
+                    recover_sends=self.recover_sends, cameras=cameras, topics=topics).start()
+        self._watchers.add(w)
+        self._link(w)
+        for cb in self.on_subscribe:
+            cb(w)
+        return w
+
+    def subscribe(self, w: Watcher, cameras: Any = KEEP, topics: Any = KEEP) -> None:
+        """
+        접속 중인 시청자의 구독 변경 (색인 갱신 후 on_subscribe 호출).
+        KEEP인 항목은 그대로 두고, None / ["*"] 는 전체 카메라 / 기본 토픽으로 되돌림.
+        """
+        if w not in self._watchers:
+            return
+        self._unlink(w)
+        if cameras is not KEEP:
+            w.cameras = normalize_cameras(cameras)
+        if topics is not KEEP:
+            w.topics = normalize_topics(topics)
+        self._link(w)
+        for cb in self.on_subscribe:
+            cb(w)
+
+    def remove(self, w: Watcher) -> None:
+        if w in self._watchers:
+            self._watchers.discard(w)
+            self._unlink(w)
+            if w.close_reason in ("too slow", "send timeout"):
+                self.disconnected_slow += 1
+        w.close(w.close_reason or "closed")
+
+    # ---- 토픽 색인 ----
+    def _link(self, w: Watcher) -> None:
+        for k in w.keys():
+            self._index.setdefault(k, set()).add(w)
+
+    def _unlink(self, w: Watcher) -> None:
+        for k in w.keys():
+            subs = self._index.get(k)
+            if subs is not None:
+                subs.discard(w)
+                if not subs:
+                    del self._index[k]
+
+    def subscribers(self, camera_id: Optional[str], topic: str) -> List[Watcher]:
+        """(카메라, 토픽) 구독자. 카메라 없는 메시지는 그 토픽 구독자 전체."""
+        if camera_id is None:
+            return list({w for (_, t), subs in self._index.items() if t == topic for w in subs})
+        return list(chain(self._index.get((camera_id, topic), ()), self._index.get((ANY_CAMERA, topic), ())))
+
+    def has_subscribers(self, camera_id: Optional[str], topic: str) -> bool:
+        if camera_id is None:
+            return any(t == topic for _, t in self._index)
+        return (camera_id, topic) in self._index or (ANY_CAMERA, topic) in self._index
+
+    def modes_for(self, camera_id: Optional[str]) -> Set[str]:
+        """카메라 하나에 대한 수요. 비어 있으면 그 카메라는 아무도 안 보고 있음."""
+        return {w.mode for w in self.subscribers(camera_id, "frames")}
+
+    def demand_for(self, camera_id: Optional[str]) -> Set[ImageKey]:
+        """카메라 하나에 대해 만들어야 할 이미지 (모드, 현재 티어) 집합. meta 시청자는 이미지 불필요."""
+        return {(w.mode, w.tier) for w in self.subscribers(camera_id, "frames") if w.mode != "meta"}
+
+    def publish(self, meta: Dict[str, Any], images: Optional[Dict[ImageKey, bytes]] = None) -> Outgoing:
+        """
+        해당 토픽 구독자 큐에만 넣음. 토픽이 없는 type은 전체 시청자에게.
+        images: (모드, 티어)별 JPEG 원본 바이트 (json 시청자에게는 dataURL로, binary 시청자에게는 그대로)
+        """
+        msg = Outgoing(meta, images)
+        droppable = msg.type in DROPPABLE_TYPES
+        topic = TYPE_TOPICS.get(msg.type)
+        targets: Collection[Watcher] = (
+            self.subscribers(meta.get("camera"), topic) if topic is not None else list(self._watchers))
+        for w in targets:
+            w.offer(msg, droppable)
+        return msg
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "watchers": len(self._watchers),
+            "binary": sum(1 for w in self._watchers if w.fmt == "binary"),
+            "topics": {t: sum(1 for w in self._watchers if t in w.topics) for t in TOPICS},
+            "camera_filtered": sum(1 for w in self._watchers if w.cameras is not None),
+            "modes": {m: sum(1 for w in self._watchers if w.mode == m) for m in MODES},
+            "tiers": {t: sum(1 for w in self._watchers if w.tier == t) for t in self.tiers},
+            "step_downs": sum(w.step_downs for w in self._watchers),
+            "queued": sum(len(w._q) for w in self._watchers),
+            "dropped": sum(w.dropped for w in self._watchers),
+            "disconnected_slow": self.disconnected_slow,
+        }
+
+
+_hub: WatcherHub | None = None
+
+def get_watcher_hub() -> WatcherHub:
+    global _hub
+    if _hub is None:
+        _hub = WatcherHub(
+            max_queue=settings.WATCHER_MAX_QUEUE,
+            send_timeout=settings.WATCHER_SEND_TIMEOUT_SEC,
+            max_drops=settings.WATCHER_MAX_DROPS,
+            tiers=list(settings.STREAM_TIERS),
+            default_tier=settings.STREAM_DEFAULT_TIER,
+            recover_sends=settings.WATCHER_TIER_RECOVER_SENDS,
+        )
+    return _hub
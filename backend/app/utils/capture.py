@@ -0,0 +1,139 @@
+# backend/app/utils/capture.py
+"""
+카메라별 캡처 스레드 (최신 프레임 1장만 보관).
+
+cap.read()를 추론 속도에 맞춰 부르면 OpenCV/RTSP 내부 버퍼가 쌓여서 화면이 점점 늦어진다.
+  - 전용 스레드가 소스를 계속 읽어서 슬롯 1개에 최신 프레임만 덮어씀
+  - 소비 쪽(pull 루프)은 항상 가장 새 프레임을 가져가고, 못 가져간 프레임은 dropped 로 집계
+  - 읽기 실패가 read_fail_sec 이상 이어지면 스레드 종료 + failed → 호출 쪽에서 재접속
+  - decode_all=False(시청자 없는 idle 카메라): grab()만 계속하고, 소비 쪽이 기다릴 때만
+    retrieve()로 디코드 → 저속 모드에서 버려질 프레임의 디코드 비용을 아낌
+→ 추론이 아무리 느려도 방송되는 프레임의 지연은 '추론 1회 시간' 정도로 유지된다.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class FrameGrabber:
+    def __init__(self, url: str, read_fail_sec: float = 5.0, name: str = "camera"):
+        self.url = url
+        self.read_fail_sec = float(read_fail_sec)
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._ts = 0.0               # 최신 프레임 수신 시각 (monotonic)
+        self._seq = 0                # 최신 프레임 번호
+        self._taken_seq = 0          # 마지막으로 소비된 번호
+        self._stop = threading.Event()
+        self._opened = threading.Event()
+        self._want = threading.Event()   # 소비 쪽이 새 프레임을 기다리는 중
+        self.decode_all = True
+        self._thread: Optional[threading.Thread] = None
+
+        self.error: Optional[str] = None
+        self.grabbed = 0
+        self.consumed = 0
+        self.dropped = 0
+
+    # ---- 수명 ----
+    def start(self) -> "FrameGrabber":
+        self._thread = threading.Thread(target=self._run, name=f"grab-{self.name}", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, join_timeout: float = 2.0) -> None:
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=join_timeout)
+
+    @property
+    def failed(self) -> bool:
+        return self.error is not None
+
+    def wait_open(self, timeout: float) -> bool:
+        """열기 완료(성공/실패)까지 대기. 열렸으면 True."""
+        self._opened.wait(timeout)
+        return self._opened.is_set() and not self.failed
+
+    # ---- 캡처 스레드 ----
+    def _run(self) -> None:
+        cap = cv2.VideoCapture(self.url)
+        try:
+            if not cap.isOpened():
+                self.error = "cannot open stream"
+                return
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)   # 지원하는 백엔드에서는 내부 버퍼도 최소화
+            self._opened.set()
+
+            fail_since: Optional[float] = None
+            while not self._stop.is_set():
+                if self.decode_all:
+                    ok, frame = cap.read()
+                else:
+                    ok, frame = cap.grab(), None
+                    if ok and self._want.is_set():
+                        ok, frame = cap.retrieve()
+                now = time.monotonic()
+                if not ok:
+                    fail_since = fail_since or now
+                    if now - fail_since > self.read_fail_sec:
+                        self.error = "stream read failed"
+                        return
+                    time.sleep(0.05)
+                    continue
+                fail_since = None
+                if frame is None:
+                    self.grabbed += 1
+                    self.dropped += 1   # 디코드 없이 건너뜀
+                    continue
+
+                with self._cond:
+                    if self._seq > self._taken_seq:
+                        self.dropped += 1     # 이전 프레임은 아무도 안 가져감
+                    self._frame = frame
+                    self._ts = now
+                    self._seq += 1
+                    self.grabbed += 1
+                    self._cond.notify_all()
+        finally:
+            cap.release()
+            self._opened.set()
+            with self._cond:
+                self._cond.notify_all()
+
+    # ---- 소비 ----
+    def latest(self, timeout: float = 1.0) -> Optional[Tuple[np.ndarray, float]]:
+        """
+        아직 안 가져간 최신 프레임 (frame, 수신 후 경과 초). timeout 동안 새 프레임이 없으면 None.
+        블로킹 호출이므로 asyncio.to_thread 로 부른다.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._seq <= self._taken_seq:
+                left = deadline - time.monotonic()
+                if left <= 0 or self._stop.is_set() or self.failed:
+                    self._want.clear()
+                    return None
+                self._want.set()
+                self._cond.wait(left)
+            self._want.clear()
+            self._taken_seq = self._seq
+            self.consumed += 1
+            return self._frame, time.monotonic() - self._ts
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "grabbed": self.grabbed,
+            "consumed": self.consumed,
+            "dropped": self.dropped,
+            "error": self.error,
+        }
@@ -0,0 +1,51 @@
+# backend/app/utils/encoding.py
+"""
+시청자 품질 티어별 JPEG 인코딩.
+
+티어 = (최대 폭 px, JPEG 품질). 폭 0이면 원본 해상도.
+  - 한 프레임에서 요청된 티어만, 티어당 1번만 인코딩
+  - 리사이즈 대상 버퍼와 오버레이 캔버스는 프레임마다 새로 만들지 않고 재사용
+생산자(카메라 루프, push 연결)마다 인스턴스 1개를 두고 그 안에서만 순차 사용한다 (스레드 안전 아님).
+"""
+from __future__ import annotations
+
+from typing import Collection, Dict, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+
+class TierEncoder:
+    def __init__(self, tiers: Dict[str, Sequence[int]]):
+        self.tiers: Dict[str, Tuple[int, int]] = {str(k): (int(v[0]), int(v[1])) for k, v in tiers.items()}
+        self._bufs: Dict[Tuple[int, ...], np.ndarray] = {}
+        self._canvas: Optional[np.ndarray] = None
+
+    def canvas(self, frame: np.ndarray) -> np.ndarray:
+        """오버레이를 그릴 프레임 사본 (버퍼 재사용)"""
+        if self._canvas is None or self._canvas.shape != frame.shape or self._canvas.dtype != frame.dtype:
+            self._canvas = np.empty_like(frame)
+        np.copyto(self._canvas, frame)
+        return self._canvas
+
+    def _scaled(self, img: np.ndarray, max_w: int) -> np.ndarray:
+        h, w = img.shape[:2]
+        if max_w <= 0 or w <= max_w:
+            return img
+        nh = max(1, int(round(h * max_w / w)))
+        shape = (nh, max_w) + img.shape[2:]
+        buf = self._bufs.get(shape)
+        if buf is None:
+            buf = self._bufs[shape] = np.empty(shape, dtype=img.dtype)
+        cv2.resize(img, (max_w, nh), dst=buf, interpolation=cv2.INTER_AREA)
+        return buf
+
+    def encode(self, img: np.ndarray, tier: str) -> bytes:
+        max_w, quality = self.tiers.get(tier) or next(iter(self.tiers.values()))
+        ok, jpg = cv2.imencode(".jpg", self._scaled(img, max_w), [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ok:
+            raise RuntimeError("encode failed")
+        return jpg.tobytes()
+
+    def encode_tiers(self, img: np.ndarray, tiers: Collection[str]) -> Dict[str, bytes]:
+        return {t: self.encode(img, t) for t in tiers}
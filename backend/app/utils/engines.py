@@ -0,0 +1,262 @@
+# backend/app/utils/engines.py
+"""
+YoloService가 쓰는 추론 엔진.
+  - UltralyticsEngine: .pt 가중치를 ultralytics/PyTorch로 실행 (기존 방식)
+  - OnnxEngine:        .onnx (없으면 .pt에서 1회 export 후 디스크 캐시)를 ONNX Runtime CPU로 실행
+                       letterbox 전처리 / NMS 모두 NumPy로 직접 처리 (torch import 없음)
+
+두 엔진 모두 predict(PreparedBatch | frames) -> [EngineResult] 를 돌려주고,
+박스 좌표는 항상 원본 프레임 픽셀 기준 xyxy.
+전처리(letterbox)는 utils/preprocess.py 에서 배치당 1회만 하고 두 모델이 공유한다.
+"""
+from __future__ import annotations
+
+import ast
+import logging
+import shutil
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+
+import numpy as np
+
+from .preprocess import PreparedBatch, prepare_batch
+
+log = logging.getLogger("app.engines")
+
+
+def _as_batch(src: Union[PreparedBatch, List[np.ndarray]], imgsz: int) -> PreparedBatch:
+    return src if isinstance(src, PreparedBatch) else prepare_batch(src, imgsz)
+
+
+class EngineResult(NamedTuple):
+    xyxy: np.ndarray                            # (N, 4) float32, 원본 프레임 좌표
+    conf: np.ndarray                            # (N,)   float32
+    cls: np.ndarray                             # (N,)   int32
+
+
+def _empty_result() -> EngineResult:
+    return EngineResult(np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+                        np.zeros(0, np.int32))
+
+
+# ==============================================================
+# ultralytics (PyTorch)
+# ==============================================================
+class UltralyticsEngine:
+    name = "ultralytics"
+
+    def __init__(self, weights: str, imgsz: int = 640, threads: int = 0):
+        from ultralytics import YOLO  # torch는 이 엔진을 쓸 때만 로드
+
+        self.weights = weights
+        self.imgsz = int(imgsz)
+        self.threads = int(threads)   # predict를 실행하는 스레드의 torch intra-op 상한 (0이면 torch 기본값)
+        self.model = YOLO(weights)
+        self.names: Dict[int, str] = dict(getattr(self.model, "names", None) or {})
+
+    def predict(self, src: Union[PreparedBatch, List[np.ndarray]]) -> List[EngineResult]:
+        import torch
+
+        if self.threads > 0 and torch.get_num_threads() != self.threads:
+            torch.set_num_threads(self.threads)
+        batch = _as_batch(src, self.imgsz)
+        # 이미 letterbox된 RGB 텐서를 넘기면 ultralytics는 전처리를 건너뛴다 (from_numpy는 복사 없음)
+        results = self.model.predict(source=torch.from_numpy(batch.tensor), imgsz=batch.imgsz, verbose=False)
+        out: List[EngineResult] = []
+        for i, res in enumerate(results):
+            boxes = res.boxes
+            if boxes is None or len(boxes) == 0:
+                out.append(_empty_result())
+                continue
+            xyxy = boxes.xyxy.cpu().numpy().astype(np.float32)
+            out.append(EngineResult(
+                batch.scale_boxes(i, xyxy),
+                boxes.conf.cpu().numpy().astype(np.float32, copy=False),
+                boxes.cls.cpu().numpy().astype(np.int32),
+            ))
+        return out
+
+
+# ==============================================================
+# ONNX Runtime (CPU)
+# ==============================================================
+def nms(boxes: np.ndarray, scores: np.ndarray, iou_thr: float) -> np.ndarray:
+    """greedy NMS (xyxy). 유지할 인덱스를 score 내림차순으로 반환."""
+    if boxes.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(0.0, x2 - x1) * np.maximum(0.0, y2 - y1)
+    order = scores.argsort()[::-1]
+    keep: List[int] = []
+    while order.size:
+        i = int(order[0])
+        keep.append(i)
+        rest = order[1:]
+        xx1 = np.maximum(x1[i], x1[rest])
+        yy1 = np.maximum(y1[i], y1[rest])
+        xx2 = np.minimum(x2[i], x2[rest])
+        yy2 = np.minimum(y2[i], y2[rest])
+        inter = np.maximum(0.0, xx2 - xx1) * np.maximum(0.0, yy2 - yy1)
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_thr]
+    return np.asarray(keep, dtype=np.int64)
+
+
+def batched_nms(boxes: np.ndarray, scores: np.ndarray, cls: np.ndarray, iou_thr: float) -> np.ndarray:
+    """클래스별 NMS (클래스마다 좌표를 크게 띄워 한 번에 처리)"""
+    if boxes.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    offset = cls.astype(np.float32)[:, None] * (float(boxes.max()) + 1.0)
+    return nms(boxes + offset, scores, iou_thr)
+
+
+def export_onnx(weights: str, cache_dir: Optional[str] = None, imgsz: int = 640) -> str:
+    """
+    .pt → .onnx export 후 디스크에 캐시. 이미 .onnx면 그대로 반환.
+    캐시 파일이 원본 가중치보다 오래됐으면 다시 export.
+    """
+    src = Path(weights)
+    if src.suffix.lower() == ".onnx":
+        return str(src)
+
+    out_dir = Path(cache_dir) if cache_dir else src.parent
+    out_dir.mkdir(parents=True, exist_ok=True)
+    dst = out_dir / f"{src.stem}_{imgsz}.onnx"
+    if dst.exists() and dst.stat().st_mtime >= src.stat().st_mtime:
+        return str(dst)
+
+    from ultralytics import YOLO  # export 시에만 torch 필요
+
+    log.info("exporting %s -> %s", src, dst)
+    exported = YOLO(str(src)).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=False)
+    tmp = Path(str(exported))
+    if tmp.resolve() != dst.resolve():
+        shutil.move(str(tmp), str(dst))
+    return str(dst)
+
+
+def int8_path(weights: str, cache_dir: Optional[str] = None, imgsz: int = 640) -> str:
+    """FP32 가중치에 대응하는 INT8 ONNX 경로 (export_onnx 캐시와 같은 위치, utils/quantize.py가 생성)."""
+    src = Path(weights)
+    out_dir = Path(cache_dir) if cache_dir else src.parent
+    stem = src.stem if src.suffix.lower() != ".onnx" else src.stem.removesuffix(f"_{imgsz}")
+    return str(out_dir / f"{stem}_{imgsz}_int8.onnx")
+
+
+def _onnx_names(session: Any) -> Dict[int, str]:
+    """ultralytics export는 metadata 'names'에 {0: 'smoke', ...} 문자열을 넣어둔다."""
+    try:
+        meta = session.get_modelmeta().custom_metadata_map or {}
+        names = ast.literal_eval(meta.get("names", "{}"))
+        return {int(k): str(v) for k, v in dict(names).items()}
+    except Exception:
+        return {}
+
+
+class OnnxEngine:
+    name = "onnx"
+
+    def __init__(
+        self,
+        weights: str,
+        imgsz: int = 640,
+        threads: int = 0,
+        cache_dir: Optional[str] = None,
+        conf: float = 0.25,
+        iou: float = 0.7,
+        max_det: int = 300,
+    ):
+        import onnxruntime as ort
+
+        self.weights = export_onnx(weights, cache_dir, imgsz)
+        self.imgsz = int(imgsz)
+        self.conf = float(conf)
+        self.iou = float(iou)
+        self.max_det = int(max_det)
+
+        so = ort.SessionOptions()
+        so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            so.intra_op_num_threads = int(threads)
+            so.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(self.weights, sess_options=so,
+                                            providers=["CPUExecutionProvider"])
+        inp = self.session.get_inputs()[0]
+        self._input = inp.name
+        # 정적 batch=1 로 export된 모델이면 프레임별로 실행
+        self._dynamic_batch = not isinstance(inp.shape[0], int) or inp.shape[0] != 1
+        self.names = _onnx_names(self.session)
+
+    def _decode(self, pred: np.ndarray, batch: PreparedBatch, i: int) -> EngineResult:
+        # YOLOv8 출력: (4 + nc, N) → (N, 4 + nc), 박스는 cx,cy,w,h
+        p = pred.T
+        scores_all = p[:, 4:]
+        cls = scores_all.argmax(axis=1).astype(np.int32)
+        conf = scores_all[np.arange(p.shape[0]), cls].astype(np.float32)
+        m = conf >= self.conf
+        if not m.any():
+            return _empty_result()
+        p, cls, conf = p[m], cls[m], conf[m]
+
+        xyxy = np.empty((p.shape[0], 4), dtype=np.float32)
+        xyxy[:, 0] = p[:, 0] - p[:, 2] / 2
+        xyxy[:, 1] = p[:, 1] - p[:, 3] / 2
+        xyxy[:, 2] = p[:, 0] + p[:, 2] / 2
+        xyxy[:, 3] = p[:, 1] + p[:, 3] / 2
+
+        keep = batched_nms(xyxy, conf, cls, self.iou)[: self.max_det]
+        xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+
+        # letterbox 좌표 → 원본 좌표
+        return EngineResult(batch.scale_boxes(i, xyxy), conf, cls)
+
+    def predict(self, src: Union[PreparedBatch, List[np.ndarray]]) -> List[EngineResult]:
+        batch = _as_batch(src, self.imgsz)
+        if not len(batch):
+            return []
+        x = batch.tensor
+        if self._dynamic_batch:
+            preds = self.session.run(None, {self._input: x})[0]
+        else:
+            # 슬라이스는 뷰라 복사 없음
+            preds = np.concatenate([self.session.run(None, {self._input: x[i:i + 1]})[0]
+                                    for i in range(len(batch))])
+        return [self._decode(preds[i], batch, i) for i in range(len(batch))]
+
+
+# ==============================================================
+# 팩토리
+# ==============================================================
+_ENGINE_ALIASES = {"ultralytics": "ultralytics", "torch": "ultralytics", "pt": "ultralytics", "onnx": "onnx"}
+
+
+def normalize_engine(engine: Optional[str]) -> str:
+    """YOLO_ENGINE 값 → 엔진 이름 ("torch"/"pt"는 "ultralytics"). 모르는 이름은 그대로 (load_engine이 거부)"""
+    e = (engine or "ultralytics").strip().lower()
+    return _ENGINE_ALIASES.get(e, e)
+
+
+def engine_for(engine: Optional[str], precision: Optional[str] = "fp32") -> str:
+    """실제로 로드될 엔진 이름: int8이면 engine 설정과 무관하게 "onnx"."""
+    if (precision or "fp32").lower() == "int8":
+        return OnnxEngine.name
+    return normalize_engine(engine)
+
+
+def load_engine(engine: str, weights: str, imgsz: int = 640, threads: int = 0,
+                cache_dir: Optional[str] = None, precision: str = "fp32"):
+    """
+    precision="int8"이면 engine 설정과 무관하게 양자화된 ONNX를 ONNX Runtime으로 실행.
+    (scripts/quantize_int8.py calibrate 로 미리 만들어 둬야 함)
+    """
+    e = engine_for(engine, precision)
+    if (precision or "fp32").lower() == "int8":
+        q = int8_path(weights, cache_dir, imgsz)
+        if not Path(q).exists():
+            raise RuntimeError(f"INT8 model not found: {q} (run scripts/quantize_int8.py calibrate)")
+        return OnnxEngine(q, imgsz=imgsz, threads=threads, cache_dir=cache_dir)
+    if e == OnnxEngine.name:
+        return OnnxEngine(weights, imgsz=imgsz, threads=threads, cache_dir=cache_dir)
+    if e == UltralyticsEngine.name:
+        return UltralyticsEngine(weights, imgsz=imgsz, threads=threads)
+    raise ValueError(f"unknown YOLO engine: {engine}")
@@ -0,0 +1,80 @@
+# backend/app/utils/gating.py
+"""
+장면 변화 게이트: 고정 카메라에서 화면이 거의 안 바뀌면 추론을 건너뛰고 직전 결과 재사용.
+
+마지막으로 '분석한' 프레임을 작은 흑백 이미지로 줄여 두고, 새 프레임과의 픽셀 차이를 본다.
+  - 바뀐 픽셀 비율 >= change_ratio  → 추론
+  - 마지막 분석 후 refresh_sec 경과 → 강제 추론 (결과가 오래 묵지 않게)
+"""
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+import cv2
+import numpy as np
+
+
+class SceneGate:
+    def __init__(
+        self,
+        width: int = 64,
+        pixel_diff: int = 12,
+        change_ratio: float = 0.01,
+        refresh_sec: float = 5.0,
+    ):
+        self.width = max(8, int(width))
+        self.pixel_diff = int(pixel_diff)
+        self.change_ratio = float(change_ratio)
+        self.refresh_sec = float(refresh_sec)
+
+        self._ref: Optional[np.ndarray] = None    # 마지막 분석 프레임 (축소 흑백)
+        self._ref_ts = 0.0
+        self._pending: Optional[np.ndarray] = None
+        self.analyzed = 0
+        self.skipped = 0
+
+    def _thumb(self, frame: np.ndarray) -> np.ndarray:
+        h, w = frame.shape[:2]
+        th = max(1, int(round(h * self.width / w)))
+        small = cv2.resize(frame, (self.width, th), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        # 센서 노이즈/압축 잡음 완화
+        return cv2.GaussianBlur(gray, (3, 3), 0)
+
+    def should_infer(self, frame: np.ndarray) -> bool:
+        """이 프레임을 분석해야 하면 True. True를 반환했다면 분석 후 mark_analyzed() 호출."""
+        thumb = self._thumb(frame)
+        self._pending = thumb
+
+        if self._ref is None or self._ref.shape != thumb.shape:
+            return True
+        if time.monotonic() - self._ref_ts >= self.refresh_sec:
+            return True
+
+        diff = cv2.absdiff(thumb, self._ref)
+        changed = float(np.count_nonzero(diff > self.pixel_diff)) / diff.size
+        if changed >= self.change_ratio:
+            return True
+
+        self.skipped += 1
+        return False
+
+    def mark_analyzed(self) -> None:
+        """직전 should_infer() 프레임을 새 기준 프레임으로."""
+        if self._pending is not None:
+            self._ref = self._pending
+            self._ref_ts = time.monotonic()
+            self.analyzed += 1
+
+    def reset(self) -> None:
+        self._ref = None
+        self._pending = None
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.analyzed + self.skipped
+        return {
+            "analyzed": self.analyzed,
+            "skipped": self.skipped,
+            "skip_ratio": round(self.skipped / total, 3) if total else 0.0,
+        }
@@ -0,0 +1,84 @@
+# backend/app/utils/preprocess.py
+"""
+공통 전처리: 프레임 배치를 한 번만 letterbox → (B, 3, S, S) float32 RGB 텐서로 만든다.
+fire/ppe 두 모델(및 타일/크롭 변형)이 같은 PreparedBatch를 복사 없이 공유하고,
+박스는 scale_boxes()로 원본 프레임 좌표로 되돌린다.
+"""
+from __future__ import annotations
+
+from concurrent.futures import Executor
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def letterbox(img: np.ndarray, size: int, color: int = 114) -> Tuple[np.ndarray, float, Tuple[float, float]]:
+    """
+    비율 유지 리사이즈 + 패딩 → (size, size, 3).
+    반환: (이미지, 배율 r, (pad_x, pad_y))  원본 좌표 = (letterbox 좌표 - pad) / r
+    """
+    h, w = img.shape[:2]
+    r = min(size / h, size / w)
+    nw, nh = int(round(w * r)), int(round(h * r))
+    px, py = (size - nw) / 2, (size - nh) / 2
+
+    resized = cv2.resize(img, (nw, nh), interpolation=cv2.INTER_LINEAR) if (nw, nh) != (w, h) else img
+    top, bottom = int(round(py - 0.1)), int(round(py + 0.1))
+    left, right = int(round(px - 0.1)), int(round(px + 0.1))
+    out = cv2.copyMakeBorder(resized, top, bottom, left, right, cv2.BORDER_CONSTANT,
+                             value=(color, color, color))
+    return out, r, (left, top)
+
+
+@dataclass
+class PreparedBatch:
+    frames: List[np.ndarray]                 # 원본 BGR 프레임 (뷰 그대로, 복사 안 함)
+    tensor: np.ndarray                       # (B, 3, S, S) float32, RGB, 0~1
+    ratios: List[float] = field(default_factory=list)
+    pads: List[Tuple[float, float]] = field(default_factory=list)
+
+    @property
+    def imgsz(self) -> int:
+        return int(self.tensor.shape[-1])
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def scale_boxes(self, i: int, xyxy: np.ndarray) -> np.ndarray:
+        """i번째 프레임의 letterbox 좌표 박스(xyxy)를 원본 좌표로 (in-place) 변환 후 반환."""
+        if xyxy.shape[0] == 0:
+            return xyxy
+        px, py = self.pads[i]
+        r = self.ratios[i]
+        xyxy[:, [0, 2]] -= px
+        xyxy[:, [1, 3]] -= py
+        xyxy /= r
+        h, w = self.frames[i].shape[:2]
+        xyxy[:, [0, 2]] = xyxy[:, [0, 2]].clip(0, w)
+        xyxy[:, [1, 3]] = xyxy[:, [1, 3]].clip(0, h)
+        return xyxy
+
+
+def prepare_batch(frames: List[np.ndarray], imgsz: int = 640,
+                  pool: Optional[Executor] = None) -> PreparedBatch:
+    """
+    프레임마다 letterbox 1회, 결과를 배치 텐서 슬롯에 바로 기록.
+    pool을 주면 프레임(타일)별 letterbox를 병렬로 처리 (cv2/NumPy는 GIL을 놓음).
+    """
+    tensor = np.empty((len(frames), 3, imgsz, imgsz), dtype=np.float32)
+    batch = PreparedBatch(frames=list(frames), tensor=tensor)
+
+    def _fill(i: int) -> Tuple[float, Tuple[float, float]]:
+        lb, r, pad = letterbox(frames[i], imgsz)
+        # BGR → RGB, HWC → CHW, 0~1
+        np.multiply(lb[:, :, ::-1].transpose(2, 0, 1), 1.0 / 255.0, out=tensor[i], casting="unsafe")
+        return r, pad
+
+    idx = range(len(frames))
+    meta = list(pool.map(_fill, idx)) if pool is not None and len(frames) > 1 else [_fill(i) for i in idx]
+    for r, pad in meta:
+        batch.ratios.append(r)
+        batch.pads.append(pad)
+    return batch
@@ -0,0 +1,110 @@
+# backend/app/utils/quantize.py
+"""
+INT8 정적 양자화 (ONNX Runtime post-training quantization).
+
+FP32 ONNX(engines.export_onnx 결과)를 대표 프레임 폴더(예: uploads/orig)로 캘리브레이션해
+<stem>_<imgsz>_int8.onnx 로 저장한다. 실행 스크립트: scripts/quantize_int8.py
+"""
+from __future__ import annotations
+
+import logging
+import re
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import cv2
+import numpy as np
+
+from .engines import export_onnx, int8_path
+from .preprocess import letterbox
+
+log = logging.getLogger("app.quantize")
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+
+def iter_images(folder: str, limit: int = 0) -> Iterator[Path]:
+    paths = sorted(p for p in Path(folder).rglob("*") if p.suffix.lower() in IMAGE_EXTS)
+    return iter(paths[:limit] if limit > 0 else paths)
+
+
+def preprocess(img_bgr: np.ndarray, imgsz: int) -> np.ndarray:
+    """OnnxEngine과 동일한 입력 (1, 3, imgsz, imgsz) float32"""
+    lb, _, _ = letterbox(img_bgr, imgsz)
+    return (lb[:, :, ::-1].transpose(2, 0, 1)[None].astype(np.float32) / 255.0)
+
+
+class _FolderReader:
+    """onnxruntime.quantization.CalibrationDataReader 구현: 폴더의 이미지를 한 장씩 공급"""
+
+    def __init__(self, folder: str, input_name: str, imgsz: int, limit: int):
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._paths = list(iter_images(folder, limit))
+        if not self._paths:
+            raise RuntimeError(f"no calibration images in {folder}")
+        self._it = iter(self._paths)
+
+    def get_next(self):
+        for p in self._it:
+            img = cv2.imread(str(p), cv2.IMREAD_COLOR)
+            if img is not None:
+                return {self.input_name: preprocess(img, self.imgsz)}
+        return None
+
+    def rewind(self) -> None:
+        self._it = iter(self._paths)
+
+
+def _head_nodes(model_path: str) -> List[str]:
+    """
+    YOLOv8 export 그래프에서 마지막 모듈(/model.N/, Detect head) 노드 이름.
+    박스 디코딩/concat이 INT8로 바뀌면 정확도 손실이 커서 FP32로 남긴다.
+    """
+    import onnx
+
+    names = [n.name for n in onnx.load(model_path).graph.node]
+    idx = [int(m.group(1)) for n in names if (m := re.match(r"^/model\.(\d+)/", n))]
+    if not idx:
+        return []
+    prefix = f"/model.{max(idx)}/"
+    return [n for n in names if n.startswith(prefix)]
+
+
+def quantize_int8(
+    weights: str,
+    calib_dir: str,
+    cache_dir: Optional[str] = None,
+    imgsz: int = 640,
+    limit: int = 200,
+    exclude_head: bool = True,
+    per_channel: bool = True,
+) -> str:
+    """
+    weights(.pt/.onnx) → INT8 ONNX. 반환: 저장 경로.
+    calib_dir 의 이미지 최대 limit장으로 activation 범위를 캘리브레이션한다.
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import CalibrationMethod, QuantFormat, QuantType, quantize_static
+
+    fp32 = export_onnx(weights, cache_dir, imgsz)
+    out = int8_path(weights, cache_dir, imgsz)
+
+    input_name = ort.InferenceSession(fp32, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    reader = _FolderReader(calib_dir, input_name, imgsz, limit)
+    exclude = _head_nodes(fp32) if exclude_head else []
+
+    log.info("quantizing %s -> %s (%d calib images, %d head nodes kept fp32)",
+             fp32, out, len(reader._paths), len(exclude))
+    quantize_static(
+        fp32,
+        out,
+        reader,
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=per_channel,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=exclude,
+    )
+    return out
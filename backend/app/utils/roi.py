@@ -0,0 +1,99 @@
+# backend/app/utils/roi.py
+"""
+카메라별 관심 영역(ROI): 하늘/도로/사무실처럼 볼 필요 없는 영역을 추론에서 제외.
+
+  - 영역은 사각형 [x1, y1, x2, y2] 또는 다각형 [[x, y], ...], 좌표는 프레임 대비 0~1 비율
+    (카메라 해상도가 바뀌어도 그대로 사용)
+  - apply(frame): 모든 영역을 감싸는 사각형만 잘라서(뷰) 추론 → 처리 픽셀 감소
+    영역이 사각형 1개가 아니면 잘라낸 영역 밖을 회색(letterbox 패딩색)으로 채움
+  - restore(dets, origin): 박스를 전체 프레임 좌표로 옮기고, 중심이 영역 밖인 디텍션은 제거
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+_FILL = 114
+
+
+def _polygon_of(region: Dict[str, Any]) -> np.ndarray:
+    """{"rect": [...]} | {"polygon": [...]} → (K, 2) 비율 좌표"""
+    if region.get("rect") is not None:
+        x1, y1, x2, y2 = (float(v) for v in region["rect"])
+        return np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float64)
+    pts = region.get("polygon")
+    if pts is None or len(pts) < 3:
+        raise ValueError("ROI region needs 'rect' [x1,y1,x2,y2] or 'polygon' with >= 3 points")
+    return np.asarray(pts, dtype=np.float64).reshape(-1, 2)
+
+
+class RoiMask:
+    def __init__(self, regions: Sequence[Dict[str, Any]]):
+        if not regions:
+            raise ValueError("at least one ROI region is required")
+        self.regions = [dict(r) for r in regions]
+        self._polys = [np.clip(_polygon_of(r), 0.0, 1.0) for r in self.regions]
+        # 사각형 1개면 자르기만 하면 되고 마스킹 불필요
+        self._rect_only = len(self.regions) == 1 and self.regions[0].get("rect") is not None
+        self._cache_size: Optional[Tuple[int, int]] = None
+        self._crop: Tuple[int, int, int, int] = (0, 0, 0, 0)
+        self._mask: Optional[np.ndarray] = None      # 잘라낸 영역 기준 (h, w) uint8
+
+    def _compile(self, h: int, w: int) -> None:
+        """프레임 크기별로 픽셀 다각형 / 크롭 사각형 / 마스크를 1회 계산"""
+        if self._cache_size == (h, w):
+            return
+        px = [np.round(p * [w, h]).astype(np.int32) for p in self._polys]
+        allp = np.concatenate(px)
+        x0, y0 = int(allp[:, 0].min()), int(allp[:, 1].min())
+        x1, y1 = int(allp[:, 0].max()), int(allp[:, 1].max())
+        x1, y1 = max(x1, x0 + 1), max(y1, y0 + 1)
+        self._crop = (x0, y0, min(x1, w), min(y1, h))
+
+        self._mask = None
+        if not self._rect_only:
+            cw, ch = self._crop[2] - x0, self._crop[3] - y0
+            mask = np.zeros((ch, cw), dtype=np.uint8)
+            cv2.fillPoly(mask, [p - [x0, y0] for p in px], 255)
+            self._mask = mask
+        self._cache_size = (h, w)
+
+    def apply(self, frame: np.ndarray) -> Tuple[np.ndarray, Tuple[int, int]]:
+        """(추론할 이미지, 프레임 내 원점 (x0, y0))"""
+        h, w = frame.shape[:2]
+        self._compile(h, w)
+        x0, y0, x1, y1 = self._crop
+        view = frame[y0:y1, x0:x1]
+        if self._mask is None:
+            return view, (x0, y0)
+        out = np.full_like(view, _FILL)
+        cv2.copyTo(view, self._mask, out)
+        return out, (x0, y0)
+
+    def _inside(self, cx: float, cy: float) -> bool:
+        x0, y0, x1, y1 = self._crop
+        if not (x0 <= cx < x1 and y0 <= cy < y1):
+            return False
+        if self._mask is None:
+            return True
+        return bool(self._mask[int(cy) - y0, int(cx) - x0])
+
+    def restore(self, dets: List[Dict[str, Any]], origin: Tuple[int, int]) -> List[Dict[str, Any]]:
+        """크롭 좌표 디텍션 → 전체 프레임 좌표, 영역 밖(중심 기준) 디텍션 제거"""
+        ox, oy = origin
+        out: List[Dict[str, Any]] = []
+        for d in dets:
+            bx = d.get("bbox")
+            if not bx:
+                continue
+            x1, y1, x2, y2 = bx[0] + ox, bx[1] + oy, bx[2] + ox, bx[3] + oy
+            if not self._inside((x1 + x2) / 2, (y1 + y2) / 2):
+                continue
+            out.append({**d, "bbox": [x1, y1, x2, y2]})
+        return out
+
+    def outline(self, h: int, w: int) -> List[np.ndarray]:
+        """오버레이용 픽셀 다각형"""
+        return [np.round(p * [w, h]).astype(np.int32) for p in self._polys]
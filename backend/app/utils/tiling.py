@@ -0,0 +1,113 @@
+# backend/app/utils/tiling.py
+"""
+고해상도 카메라용 타일(슬라이스) 추론.
+
+4K 프레임을 통째로 imgsz(640)로 줄이면 멀리 있는 작업자의 안전모 같은 작은 객체가 사라진다.
+  - 프레임을 겹치는 tile x tile 영역으로 나눔 (프레임 슬라이스 = 뷰, 복사 없음)
+  - 모든 타일(+ 선택적으로 전체 프레임 축소본)을 하나의 배치로 모델에 넣음
+  - 타일 좌표 박스를 프레임 좌표로 옮긴 뒤, 같은 클래스끼리 IoS 기준으로 중복 제거
+    (타일 경계에서 잘린 박스는 IoU가 낮아도 작은 쪽이 큰 쪽에 거의 포함되므로 IoS 사용)
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import List, Tuple
+
+import numpy as np
+
+from .engines import EngineResult
+
+
+def tile_grid(h: int, w: int, tile: int, overlap: float) -> List[Tuple[int, int, int, int]]:
+    """(x0, y0, x1, y1) 타일 목록. 마지막 타일은 프레임 끝에 맞춰 붙인다."""
+    step = max(1, int(tile * (1.0 - overlap)))
+
+    def _starts(n: int) -> List[int]:
+        if n <= tile:
+            return [0]
+        s = list(range(0, n - tile, step))
+        s.append(n - tile)
+        return s
+
+    return [(x, y, min(x + tile, w), min(y + tile, h)) for y in _starts(h) for x in _starts(w)]
+
+
+@dataclass
+class TilePlan:
+    frames: List[np.ndarray]                                     # 원본 프레임
+    views: List[np.ndarray] = field(default_factory=list)        # 배치에 들어갈 타일 뷰
+    owners: List[int] = field(default_factory=list)              # 뷰 → 원본 프레임 인덱스
+    offsets: List[Tuple[int, int]] = field(default_factory=list) # 뷰 → 프레임 내 (x0, y0)
+
+    def merge(self, results: List[EngineResult], ios_thr: float = 0.5) -> List[EngineResult]:
+        """뷰별 결과 → 프레임별 결과 (좌표 이동 + 클래스별 중복 제거)"""
+        per: List[List[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = [[] for _ in self.frames]
+        for res, owner, (ox, oy) in zip(results, self.owners, self.offsets):
+            if res.conf.shape[0] == 0:
+                continue
+            xyxy = res.xyxy.copy()
+            xyxy[:, [0, 2]] += ox
+            xyxy[:, [1, 3]] += oy
+            per[owner].append((xyxy, res.conf, res.cls))
+
+        merged: List[EngineResult] = []
+        for parts in per:
+            if not parts:
+                merged.append(EngineResult(np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+                                           np.zeros(0, np.int32)))
+                continue
+            xyxy = np.concatenate([p[0] for p in parts]).astype(np.float32, copy=False)
+            conf = np.concatenate([p[1] for p in parts])
+            cls = np.concatenate([p[2] for p in parts])
+            keep = suppress_ios(xyxy, conf, cls, ios_thr)
+            merged.append(EngineResult(xyxy[keep], conf[keep], cls[keep]))
+        return merged
+
+
+def plan_tiles(frames: List[np.ndarray], tile: int, overlap: float = 0.2,
+               include_full: bool = True) -> TilePlan:
+    """
+    프레임마다 타일 뷰 생성. include_full=True면 전체 프레임도 한 장 넣어서
+    타일보다 큰 객체(화재 연기 등)가 잘려서 놓치지 않게 한다.
+    타일 1장으로 덮이는 작은 프레임은 전체 프레임만 넣는다.
+    """
+    plan = TilePlan(frames=list(frames))
+    for i, f in enumerate(frames):
+        h, w = f.shape[:2]
+        grid = tile_grid(h, w, tile, overlap)
+        if len(grid) == 1 or include_full:
+            plan.views.append(f)
+            plan.owners.append(i)
+            plan.offsets.append((0, 0))
+        if len(grid) == 1:
+            continue
+        for x0, y0, x1, y1 in grid:
+            plan.views.append(f[y0:y1, x0:x1])   # 슬라이스 = 뷰
+            plan.owners.append(i)
+            plan.offsets.append((x0, y0))
+    return plan
+
+
+def suppress_ios(boxes: np.ndarray, scores: np.ndarray, cls: np.ndarray, thr: float) -> np.ndarray:
+    """
+    greedy 중복 제거: 같은 클래스에서 교집합 / 작은 박스 면적 > thr 이면 낮은 score 쪽 제거.
+    유지할 인덱스를 score 내림차순으로 반환.
+    """
+    if boxes.shape[0] == 0:
+        return np.zeros(0, dtype=np.int64)
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(0.0, x2 - x1) * np.maximum(0.0, y2 - y1)
+    order = scores.argsort()[::-1]
+    keep: List[int] = []
+    while order.size:
+        i = int(order[0])
+        keep.append(i)
+        rest = order[1:]
+        xx1 = np.maximum(x1[i], x1[rest])
+        yy1 = np.maximum(y1[i], y1[rest])
+        xx2 = np.minimum(x2[i], x2[rest])
+        yy2 = np.minimum(y2[i], y2[rest])
+        inter = np.maximum(0.0, xx2 - xx1) * np.maximum(0.0, yy2 - yy1)
+        ios = inter / (np.minimum(areas[i], areas[rest]) + 1e-9)
+        order = rest[(ios <= thr) | (cls[rest] != cls[i])]
+    return np.asarray(keep, dtype=np.int64)
@@ -0,0 +1,220 @@
+# backend/app/utils/tracking.py
+"""
+경량 다중 객체 추적 (ByteTrack 방식 단순화).
+
+라이브 스트림에서 YOLO는 N프레임마다(또는 추적 신뢰도가 떨어질 때)만 돌리고,
+그 사이에는 등속 칼만 필터로 박스를 앞으로 밀어 준다.
+  - update(dets): 디텍션 프레임. 높은 conf → 낮은 conf 순으로 IoU 매칭 (같은 라벨끼리)
+  - predict():    중간 프레임. 박스만 예측해서 반환
+  - hold():       장면 게이트가 건너뛴 프레임. 트랙을 늙히지 않고 그대로 반환
+  - need_detect(): N프레임 경과 또는 추적 신뢰도 하락 시 True
+반환 dict에는 track_id / hits / confirmed 가 붙는다. confirmed(hits >= min_hits)는
+두 번 이상 연속으로 잡힌 객체 → 위험도 판단은 확정 트랙만 보고 한 프레임짜리 오검출은 무시.
+high_conf는 매칭 우선순위만 정하고, 새 트랙은 new_track_conf 이상이면 생성 (기본 0 = 라벨 임계치를
+통과한 디텍션은 모두 미확정 트랙으로 시작) → 추적을 켜도 위험 감지 conf 임계치는 그대로.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 등속 모델: 상태 [cx, cy, w, h, vcx, vcy, vw, vh]
+_F = np.eye(8, dtype=np.float64)
+_F[:4, 4:] = np.eye(4)
+_H = np.eye(4, 8, dtype=np.float64)
+
+
+def _xyxy_to_z(b) -> np.ndarray:
+    x1, y1, x2, y2 = b
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, max(1.0, x2 - x1), max(1.0, y2 - y1)])
+
+
+def _z_to_xyxy(z: np.ndarray) -> List[float]:
+    cx, cy, w, h = z[:4]
+    w, h = max(1.0, w), max(1.0, h)
+    return [float(cx - w / 2), float(cy - h / 2), float(cx + w / 2), float(cy + h / 2)]
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """a (N,4), b (M,4) xyxy → (N, M) IoU"""
+    if a.size == 0 or b.size == 0:
+        return np.zeros((a.shape[0], b.shape[0]))
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+class _Track:
+    __slots__ = ("id", "label", "conf", "x", "P", "hits", "misses", "extra")
+
+    def __init__(self, tid: int, det: Dict[str, Any]):
+        self.id = tid
+        self.label = det["label"]
+        self.conf = float(det["conf"])
+        z = _xyxy_to_z(det["bbox"])
+        self.x = np.concatenate([z, np.zeros(4)])
+        std = np.array([z[3] / 10] * 4 + [z[3] / 16] * 4)
+        self.P = np.diag(std ** 2)
+        self.hits = 1
+        self.misses = 0     # 마지막 디텍션 매칭 후 지난 프레임 수
+        self.extra = {k: v for k, v in det.items() if k not in ("label", "conf", "bbox")}
+
+    def predict(self) -> None:
+        h = self.x[3]
+        q = np.array([h / 20] * 4 + [h / 160] * 4)
+        self.x = _F @ self.x
+        self.P = _F @ self.P @ _F.T + np.diag(q ** 2)
+        self.misses += 1
+
+    def correct(self, det: Dict[str, Any]) -> None:
+        z = _xyxy_to_z(det["bbox"])
+        r = np.array([z[3] / 20] * 4)
+        S = _H @ self.P @ _H.T + np.diag(r ** 2)
+        K = self.P @ _H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ (z - _H @ self.x)
+        self.P = (np.eye(8) - K @ _H) @ self.P
+        self.conf = float(det["conf"])
+        self.hits += 1
+        self.misses = 0
+
+    @property
+    def bbox(self) -> List[float]:
+        return _z_to_xyxy(self.x)
+
+
+class Tracker:
+    def __init__(
+        self,
+        detect_every: int = 5,
+        iou_thr: float = 0.3,
+        high_conf: float = 0.5,
+        max_age: int = 15,
+        min_hits: int = 2,
+        min_confidence: float = 0.3,
+        conf_decay: float = 0.9,
+        new_track_conf: float = 0.0,
+    ):
+        self.detect_every = max(1, int(detect_every))
+        self.iou_thr = float(iou_thr)
+        self.high_conf = float(high_conf)
+        self.max_age = int(max_age)
+        self.min_hits = int(min_hits)
+        self.min_confidence = float(min_confidence)
+        self.conf_decay = float(conf_decay)
+        self.new_track_conf = float(new_track_conf)
+
+        self._tracks: List[_Track] = []
+        self._next_id = 1
+        self._since_detect = 0
+        self._frame_size: Optional[tuple] = None
+
+    # ---- 판단 ----
+    def _track_confidence(self, t: _Track) -> float:
+        return t.conf * (self.conf_decay ** t.misses)
+
+    def need_detect(self) -> bool:
+        if self._since_detect + 1 >= self.detect_every:
+            return True
+        for t in self._tracks:
+            if t.hits >= self.min_hits and self._track_confidence(t) < self.min_confidence:
+                return True
+            if self._frame_size is not None:
+                h, w = self._frame_size
+                x1, y1, x2, y2 = t.bbox
+                if x2 <= 0 or y2 <= 0 or x1 >= w or y1 >= h:   # 화면 밖으로 나감
+                    return True
+        return False
+
+    # ---- 갱신 ----
+    def _match(self, tracks: List[_Track], dets: List[Dict[str, Any]]):
+        """같은 라벨끼리 IoU greedy 매칭 → (매칭쌍, 남은 트랙, 남은 디텍션)"""
+        if not tracks or not dets:
+            return [], list(tracks), list(dets)
+        tb = np.array([t.bbox for t in tracks], dtype=np.float64)
+        db = np.array([d["bbox"] for d in dets], dtype=np.float64)
+        iou = iou_matrix(tb, db)
+        same = np.array([[t.label == d["label"] for d in dets] for t in tracks])
+        iou[~same] = 0.0
+
+        pairs = []
+        used_t, used_d = set(), set()
+        for flat in np.argsort(-iou, axis=None):
+            ti, di = divmod(int(flat), iou.shape[1])
+            if iou[ti, di] < self.iou_thr:
+                break
+            if ti in used_t or di in used_d:
+                continue
+            used_t.add(ti)
+            used_d.add(di)
+            pairs.append((tracks[ti], dets[di]))
+        rest_t = [t for i, t in enumerate(tracks) if i not in used_t]
+        rest_d = [d for i, d in enumerate(dets) if i not in used_d]
+        return pairs, rest_t, rest_d
+
+    def update(self, dets: List[Dict[str, Any]], frame_shape: Optional[tuple] = None) -> List[Dict[str, Any]]:
+        """디텍션 프레임: 예측 → 2단계 매칭 → 생성/삭제"""
+        if frame_shape is not None:
+            self._frame_size = tuple(frame_shape[:2])
+        self._since_detect = 0
+        for t in self._tracks:
+            t.predict()
+
+        dets = [d for d in dets if d.get("bbox")]
+        high = [d for d in dets if d["conf"] >= self.high_conf]
+        low = [d for d in dets if d["conf"] < self.high_conf]
+
+        pairs, rest_t, rest_high = self._match(self._tracks, high)
+        pairs2, rest_t, rest_low = self._match(rest_t, low)
+        for t, d in pairs + pairs2:
+            t.correct(d)
+
+        # 미확정 트랙이 다음 디텍션에서 다시 안 잡히면 노이즈로 보고 바로 삭제
+        lost = {id(t) for t in rest_t if t.hits < self.min_hits}
+        self._tracks = [t for t in self._tracks if id(t) not in lost]
+
+        # 매칭 안 된 디텍션은 미확정 트랙으로 시작 (new_track_conf 미만은 버림)
+        for d in rest_high + rest_low:
+            if d["conf"] < self.new_track_conf:
+                continue
+            self._tracks.append(_Track(self._next_id, d))
+            self._next_id += 1
+
+        self._tracks = [t for t in self._tracks if t.misses <= self.max_age]
+        return self._emit()
+
+    def predict(self) -> List[Dict[str, Any]]:
+        """중간 프레임: 디텍션 없이 박스만 전진"""
+        self._since_detect += 1
+        for t in self._tracks:
+            t.predict()
+        self._tracks = [t for t in self._tracks if t.misses <= self.max_age]
+        return self._emit()
+
+    def hold(self) -> List[Dict[str, Any]]:
+        """
+        게이트가 "장면 변화 없음"으로 디텍션을 생략한 프레임: 시간도 트랙 나이도 그대로.
+        정지한 위험물이 게이트 강제 갱신(GATE_REFRESH_SEC)까지 살아남아 다음 디텍션에서 확정되도록.
+        """
+        return self._emit()
+
+    def _emit(self) -> List[Dict[str, Any]]:
+        out = []
+        for t in self._tracks:
+            out.append({
+                **t.extra,
+                "label": t.label,
+                "conf": round(self._track_confidence(t), 4),
+                "bbox": t.bbox,
+                "track_id": t.id,
+                "hits": t.hits,
+                "confirmed": t.hits >= self.min_hits,
+            })
+        return out
+
+    def reset(self) -> None:
+        self._tracks.clear()
+        self._since_detect = 0
@@ -1,15 +1,22 @@
 # backend/app/utils/vision.py
 from __future__ import annotations
 
-from ultralytics import YOLO
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Literal, Optional, Union, Tuple, Dict, List, Any
 import numpy as np
 import cv2
+import hashlib
 import json
 import os
 
+from .engines import EngineResult, load_engine, normalize_engine
+from .preprocess import PreparedBatch, prepare_batch
+from .tiling import TilePlan, plan_tiles
+
 ModelKind = Literal["fire", "ppe"]
+# 추론 결과에 무엇을 담을지: 디텍션만 / 주석 이미지만 / 둘 다
+OutputMode = Literal["detections", "annotated", "both"]
 
 
 @dataclass
@@ -19,7 +26,85 @@ class Detection:
     bbox: list[float]  # [x1, y1, x2, y2] in pixels (xyxy)
 
 
-def _load_labels(json_path: Optional[str]) -> dict:
+class LabelTable:
+    """
+    class id로 바로 인덱싱하는 라벨/임계치 배열. 모델 로드 시 1회 컴파일.
+      names[cls]      -> 라벨 문자열 (커스텀 라벨 우선, 없으면 모델 내장 names)
+      thresholds[cls] -> per-class conf 임계치 (라벨별 → "default" → service default_conf)
+    """
+
+    def __init__(self, model_names: Optional[dict], meta: dict, default_conf: float):
+        self._model_names = {int(k): str(v) for k, v in (model_names or {}).items()}
+        custom = meta.get("names") or {}
+        if isinstance(custom, list):
+            custom = dict(enumerate(custom))
+        self._custom_names = {str(k): str(v) for k, v in custom.items()}
+        self._thresholds = meta.get("thresholds") or {}
+        self._default = float(self._thresholds.get("default", default_conf))
+
+        ids = list(self._model_names) + [int(k) for k in self._custom_names if k.isdigit()]
+        self.names = np.empty(0, dtype=object)
+        self.thresholds = np.empty(0, dtype=np.float32)
+        self._grow((max(ids) + 1) if ids else 0)
+
+    def label_of(self, cls_idx: int) -> str:
+        return self._custom_names.get(str(cls_idx)) or self._model_names.get(int(cls_idx), str(cls_idx))
+
+    def _grow(self, n: int) -> None:
+        start = len(self.names)
+        if n <= start:
+            return
+        labels = [self.label_of(i) for i in range(start, n)]
+        thr = [float(self._thresholds.get(l, self._default)) for l in labels]
+        self.names = np.concatenate([self.names, np.array(labels, dtype=object)])
+        self.thresholds = np.concatenate([self.thresholds, np.array(thr, dtype=np.float32)])
+
+    def ensure(self, cls: np.ndarray) -> None:
+        """표에 없는 class id가 나오면(라벨 파일 불일치 등) 표를 늘림"""
+        if cls.size and int(cls.max()) >= len(self.names):
+            self._grow(int(cls.max()) + 1)
+
+
+@dataclass
+class DetectionSet:
+    """
+    한 프레임·한 모델의 디텍션을 열(column) 형태로 보관.
+    순회/인덱싱하면 Detection 객체가 나오므로 기존 리스트처럼 쓸 수 있다.
+    """
+    xyxy: np.ndarray      # (N, 4) float32
+    conf: np.ndarray      # (N,)   float32
+    cls: np.ndarray       # (N,)   int32
+    names: np.ndarray     # LabelTable.names (class id → 라벨)
+
+    @classmethod
+    def empty(cls, names: Optional[np.ndarray] = None) -> "DetectionSet":
+        return cls(np.zeros((0, 4), np.float32), np.zeros(0, np.float32),
+                   np.zeros(0, np.int32), names if names is not None else np.empty(0, dtype=object))
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.names[self.cls] if len(self.cls) else np.empty(0, dtype=object)
+
+    def __len__(self) -> int:
+        return int(self.conf.shape[0])
+
+    def __getitem__(self, i: int) -> Detection:
+        return Detection(label=str(self.names[self.cls[i]]), conf=float(self.conf[i]),
+                         bbox=self.xyxy[i].tolist())
+
+    def __iter__(self):
+        labels = self.labels.tolist()
+        confs = self.conf.tolist()
+        boxes = self.xyxy.tolist()
+        for label, conf, bbox in zip(labels, confs, boxes):
+            yield Detection(label=str(label), conf=conf, bbox=bbox)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return [{"label": str(l), "conf": c, "bbox": b}
+                for l, c, b in zip(self.labels.tolist(), self.conf.tolist(), self.xyxy.tolist())]
+
+
+def load_labels(json_path: Optional[str]) -> dict:
     """
     라벨/임계치 메타 로더
       허용 형태:
@@ -51,6 +136,60 @@ def _load_labels(json_path: Optional[str]) -> dict:
     return {"names": names, "thresholds": thresholds}
 
 
+def service_fingerprint(engine: str, imgsz: int, default_conf: float,
+                        fire: Tuple[Optional[str], Optional[str], dict],
+                        ppe: Tuple[Optional[str], Optional[str], dict],
+                        tile: list) -> str:
+    """
+    결과 캐시 무효화용 지문: 가중치(경로/크기/mtime)/라벨·임계치/엔진 설정이 바뀌면 값이 바뀜.
+    fire/ppe = (설정된 가중치 경로 | None, precision, 라벨 meta). 모델을 로드하지 않고도 계산 가능.
+    """
+    def _weights_sig(path: Optional[str]) -> Optional[list]:
+        if not path:
+            return None
+        try:
+            st = os.stat(path)
+            return [str(path), st.st_size, int(st.st_mtime)]
+        except (OSError, TypeError):
+            return [str(path)]
+
+    sig = {
+        "engine": engine,
+        "imgsz": imgsz,
+        "default_conf": default_conf,
+        "fire": [_weights_sig(fire[0]), fire[1], fire[2]],
+        "ppe":  [_weights_sig(ppe[0]), ppe[1], ppe[2]],
+        "tile": tile,
+    }
+    raw = json.dumps(sig, sort_keys=True, default=str).encode()
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def set_intra_op_threads(n: int) -> None:
+    """
+    현재 스레드의 torch intra-op 스레드 수 제한.
+    (OpenMP 빌드에서는 호출한 스레드에만 적용되므로 모델별 스레드 예산으로 쓸 수 있음)
+    """
+    if n <= 0:
+        return
+    try:
+        import torch
+        torch.set_num_threads(int(n))
+    except Exception:
+        pass
+
+
+def draw_detections(img_bgr: np.ndarray, dets: "DetectionSet") -> np.ndarray:
+    """원본 프레임 좌표 기준 주석 그리기 (모든 엔진 공통). 원본은 건드리지 않음."""
+    view = img_bgr.copy()
+    for d in dets:
+        x1, y1, x2, y2 = map(int, d.bbox)
+        cv2.rectangle(view, (x1, y1), (x2, y2), (0, 0, 255), 2)
+        cv2.putText(view, f"{d.label} {d.conf:.2f}", (x1, max(12, y1 - 6)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+    return view
+
+
 def _decode_image(img: Union[bytes, np.ndarray]) -> np.ndarray:
     """
     bytes(JPEG/PNG) 또는 BGR ndarray 모두 허용해서 BGR ndarray로 반환.
@@ -76,79 +215,212 @@ class YoloService:
         fire_labels_json: Optional[str] = None,
         ppe_labels_json: Optional[str] = None,
         default_conf: float = 0.25,
+        parallel_models: bool = False,
+        model_threads: int = 0,
+        engine: str = "ultralytics",
+        imgsz: int = 640,
+        onnx_cache_dir: Optional[str] = None,
+        fire_precision: str = "fp32",
+        ppe_precision: str = "fp32",
+        tile_size: int = 640,
+        tile_overlap: float = 0.2,
+        tile_merge_ios: float = 0.5,
+        tile_full_frame: bool = True,
+        tile_workers: int = 4,
+        tile_batch: int = 16,
     ):
         """
         fire_path/ppe_path는 없을 수도 있음(None/빈문자열).
+        parallel_models=True면 "both"에서 두 모델을 각자 전용 스레드에서 동시에 실행
+        (model_threads = 모델 스레드별 intra-op 스레드 수, 0이면 torch 기본값).
+        engine: "ultralytics"(.pt, PyTorch) | "onnx"(ONNX Runtime CPU, .pt면 export 후 캐시)
+        *_precision: "fp32" | "int8" (int8은 모델별로 양자화 ONNX 사용)
+        tile_*: infer(..., tiled=True)일 때 타일 크기(원본 px)/겹침 비율/병합 IoS/전체 프레임 포함 여부
+        tile_batch: 타일 뷰를 predict 1회에 최대 몇 장씩 넣을지 (입력 텐서 메모리 상한)
         """
         self.default_conf = float(default_conf)
+        self.engine = normalize_engine(engine)
+        self.imgsz = int(imgsz)
+        self.tile_size = int(tile_size)
+        self.tile_overlap = float(tile_overlap)
+        self.tile_merge_ios = float(tile_merge_ios)
+        self.tile_full_frame = bool(tile_full_frame)
+        self.tile_batch = max(1, int(tile_batch))
+
+        def _load(path: Optional[str], precision: str):
+            if not path:
+                return None
+            return load_engine(self.engine, path, imgsz=self.imgsz, threads=model_threads,
+                               cache_dir=onnx_cache_dir, precision=precision)
 
-        self.fire = YOLO(fire_path) if fire_path else None
-        self.ppe  = YOLO(ppe_path)  if ppe_path  else None
+        self.fire = _load(fire_path, fire_precision)
+        self.ppe  = _load(ppe_path, ppe_precision)
+        self.fire_precision = fire_precision if self.fire else None
+        self.ppe_precision  = ppe_precision if self.ppe else None
 
         # 디버그 가시성용 필드
         self.fire_weights = fire_path
         self.ppe_weights  = ppe_path
 
-        self.fire_meta = _load_labels(fire_labels_json)
-        self.ppe_meta  = _load_labels(ppe_labels_json)
+        self.fire_meta = load_labels(fire_labels_json)
+        self.ppe_meta  = load_labels(ppe_labels_json)
 
-    # --- 내부 실행: 한 모델에 대해 예측 + per-class 임계치 필터링 ---
-    def _run(self, model: YOLO, img_bgr: np.ndarray, meta: dict) -> Tuple[List[Detection], np.ndarray]:
-        # YOLO는 BGR ndarray 입력 가능
-        res = model.predict(source=img_bgr, imgsz=640, verbose=False)[0]
+        # 라벨/임계치를 class id 인덱스 배열로 미리 컴파일
+        self.fire_table = LabelTable(getattr(self.fire, "names", None), self.fire_meta, self.default_conf) if self.fire else None
+        self.ppe_table  = LabelTable(getattr(self.ppe, "names", None),  self.ppe_meta,  self.default_conf) if self.ppe else None
 
-        # 모델 내장 names 우선, 메타 names가 있으면 override
-        model_names = getattr(model, "names", None) or getattr(res, "names", None) or {}
-        custom_names = meta.get("names") or {}
-        thresholds = meta.get("thresholds") or {}
+        # 결과 캐시 무효화용: 가중치/라벨·임계치/엔진 설정이 바뀌면 값이 바뀜
+        self.version = self._fingerprint()
 
-        def label_of(cls_idx: int) -> str:
-            # 커스텀 라벨 매핑 우선
-            return custom_names.get(str(cls_idx)) or model_names.get(int(cls_idx), str(cls_idx))
+        # 모델별 전용 스레드 1개씩: 한 모델은 항상 같은 스레드에서만 실행(스레드 안전)
+        # torch 스레드 수 제한은 실제로 ultralytics 엔진이 로드된 모델만 (int8/onnx는 세션 옵션으로 이미 제한, torch import 안 함)
+        self._model_threads: Dict[str, ThreadPoolExecutor] = {}
+        if parallel_models:
+            for key, model in (("fire", self.fire), ("ppe", self.ppe)):
+                if model is not None:
+                    torch_init = model.name == "ultralytics"
+                    self._model_threads[key] = ThreadPoolExecutor(
+                        max_workers=1,
+                        thread_name_prefix=f"yolo-{key}",
+                        initializer=set_intra_op_threads if torch_init else None,
+                        initargs=(model_threads,) if torch_init else (),
+                    )
 
-        dets: List[Detection] = []
-        if res.boxes is not None:
-            for b in res.boxes:
-                x1, y1, x2, y2 = b.xyxy[0].tolist()
-                conf = float(b.conf[0])
-                cls  = int(b.cls[0])
-                label = str(label_of(cls))
+        # 타일 letterbox 병렬 처리용
+        self._tile_pool = ThreadPoolExecutor(max_workers=max(1, int(tile_workers)),
+                                             thread_name_prefix="yolo-tile")
 
-                # per-class threshold (없으면 default → service default_conf)
-                thr = float(thresholds.get(label, thresholds.get("default", self.default_conf)))
-                if conf < thr:
-                    continue
+    def _fingerprint(self) -> str:
+        return service_fingerprint(
+            self.engine, self.imgsz, self.default_conf,
+            fire=(self.fire_weights if self.fire else None, self.fire_precision, self.fire_meta),
+            ppe=(self.ppe_weights if self.ppe else None, self.ppe_precision, self.ppe_meta),
+            tile=[self.tile_size, self.tile_overlap, self.tile_merge_ios, self.tile_full_frame],
+        )
 
-                dets.append(Detection(label=label, conf=conf, bbox=[x1, y1, x2, y2]))
+    # --- 내부 실행: 한 모델에 대해 예측 + per-class 임계치 필터링 (배열 연산) ---
+    def _postprocess(self, res: EngineResult, table: LabelTable, frame: np.ndarray,
+                     annotate: bool = True) -> Tuple[DetectionSet, Optional[np.ndarray]]:
+        if res.conf.shape[0] == 0:
+            dets = DetectionSet.empty(table.names)
+        else:
+            table.ensure(res.cls)
+            # per-class threshold 한 번에 비교
+            keep = res.conf >= table.thresholds[res.cls]
+            dets = DetectionSet(res.xyxy[keep], res.conf[keep], res.cls[keep], table.names)
 
-        annotated = res.plot()  # BGR annotated frame
+        # 주석 그리기는 프레임 복사 + 그리기 비용이 있으므로 필요할 때만
+        annotated = None
+        if annotate:
+            annotated = draw_detections(frame, dets)
         return dets, annotated
 
+    def _run_batch(self, model: Any, batch: PreparedBatch, table: LabelTable,
+                   annotate: bool = True) -> List[Tuple[DetectionSet, Optional[np.ndarray]]]:
+        # 엔진은 공유 전처리 배치를 받아 한 번의 배치 추론으로 처리
+        results = model.predict(batch)
+        return [self._postprocess(res, table, f, annotate) for res, f in zip(results, batch.frames)]
+
+    def _models_for(self, kind: str) -> List[Tuple[str, Any, LabelTable]]:
+        k = (kind or "both").lower()
+        models: List[Tuple[str, Any, LabelTable]] = []
+        if k in ("fire", "both") and self.fire is not None:
+            models.append(("fire", self.fire, self.fire_table))
+        if k in ("ppe", "both") and self.ppe is not None:
+            models.append(("ppe", self.ppe, self.ppe_table))
+        return models
+
+    def _run_models(self, kind: str, batch: PreparedBatch,
+                    annotate: bool = True) -> Dict[str, List[Tuple[DetectionSet, Optional[np.ndarray]]]]:
+        """
+        kind에 해당하는 모델들을 같은 전처리 배치에 실행 (letterbox는 이미 1회 완료).
+        모델이 2개이고 전용 스레드가 있으면 동시에 실행 → 지연 ≈ 느린 쪽 모델 하나.
+        """
+        models = self._models_for(kind)
+        if len(models) > 1 and self._model_threads:
+            futs = {
+                key: self._model_threads[key].submit(self._run_batch, model, batch, table, annotate)
+                for key, model, table in models
+            }
+            return {key: f.result() for key, f in futs.items()}
+        return {key: self._run_batch(model, batch, table, annotate) for key, model, table in models}
+
+    def _run_tiled(self, kind: str, plan: TilePlan,
+                   annotate: bool = True) -> Dict[str, List[Tuple[DetectionSet, Optional[np.ndarray]]]]:
+        """
+        타일 뷰를 tile_batch 장씩 나눠 predict (4K 한 장 ≈ 40뷰 → 프레임 배치 전체를 한 텐서로 만들지 않음).
+        청크마다 letterbox → 모델별 predict(두 모델이면 동시에), 원시 결과를 모아 프레임 좌표로 병합.
+        """
+        models = self._models_for(kind)
+        raw: Dict[str, List[EngineResult]] = {key: [] for key, _, _ in models}
+        for i in range(0, len(plan.views), self.tile_batch):
+            chunk = prepare_batch(plan.views[i:i + self.tile_batch], self.imgsz, pool=self._tile_pool)
+            if len(models) > 1 and self._model_threads:
+                futs = {key: self._model_threads[key].submit(model.predict, chunk) for key, model, _ in models}
+                for key, f in futs.items():
+                    raw[key].extend(f.result())
+            else:
+                for key, model, _ in models:
+                    raw[key].extend(model.predict(chunk))
+        return {
+            key: [self._postprocess(res, table, f, annotate)
+                  for res, f in zip(plan.merge(raw[key], self.tile_merge_ios), plan.frames)]
+            for key, _, table in models
+        }
+
     # --- 공개 API: bytes/ndarray 상관없이 추론 ---
     def infer(
         self,
         img: Union[bytes, np.ndarray],
         kind: Literal["fire", "ppe", "both"] = "both",
+        output: OutputMode = "both",
+        tiled: bool = False,
     ) -> Dict[str, Dict[str, Any]]:
         """
         반환:
           {
-            "fire": {"detections":[Detection...], "annotated": np.ndarray(BGR)},
-            "ppe":  {"detections":[Detection...], "annotated": np.ndarray(BGR)}
+            "fire": {"detections": DetectionSet, "annotated": np.ndarray(BGR)},
+            "ppe":  {"detections": DetectionSet, "annotated": np.ndarray(BGR)}
           }
-        둘 중 하나만 요청되면 해당 키만 존재.
+        둘 중 하나만 요청되면 해당 키만 존재. DetectionSet은 순회하면 Detection이 나온다.
+        output="detections"면 "annotated"(주석 그리기) 생략, "annotated"면 "detections" 생략.
+        tiled=True면 겹치는 타일로 나눠 추론 후 병합 (고해상도 프레임의 작은 객체용).
         """
-        img_bgr = _decode_image(img)
-        out: Dict[str, Dict[str, Any]] = {}
+        return self.infer_batch([img], kind=kind, output=output, tiled=tiled)[0]
 
-        k = (kind or "both").lower()
+    def infer_batch(
+        self,
+        imgs: List[Union[bytes, np.ndarray]],
+        kind: Literal["fire", "ppe", "both"] = "both",
+        output: OutputMode = "both",
+        tiled: bool = False,
+    ) -> List[Dict[str, Dict[str, Any]]]:
+        """
+        여러 프레임을 모델별 1회 배치 predict로 처리.
+        반환: 입력 순서대로 infer()와 같은 형태의 dict 리스트.
+        """
+        frames = [_decode_image(im) for im in imgs]
+        outs: List[Dict[str, Dict[str, Any]]] = [{} for _ in frames]
+        if not frames:
+            return outs
 
-        if k in ("fire", "both") and self.fire is not None:
-            dets, ann = self._run(self.fire, img_bgr, self.fire_meta)
-            out["fire"] = {"detections": dets, "annotated": ann}
+        want_dets = output in ("detections", "both")
+        want_ann  = output in ("annotated", "both")
 
-        if k in ("ppe", "both") and self.ppe is not None:
-            dets, ann = self._run(self.ppe, img_bgr, self.ppe_meta)
-            out["ppe"] = {"detections": dets, "annotated": ann}
+        # 디코드/letterbox는 프레임당 1회 → 두 모델이 공유
+        if tiled and self.tile_size > 0:
+            # 모든 프레임의 타일 뷰를 tile_batch 장씩 (letterbox는 타일별 병렬)
+            plan = plan_tiles(frames, self.tile_size, self.tile_overlap, self.tile_full_frame)
+            results = self._run_tiled(kind, plan, annotate=want_ann)
+        else:
+            results = self._run_models(kind, prepare_batch(frames, self.imgsz), annotate=want_ann)
+        for key, per_frame in results.items():
+            for i, (dets, ann) in enumerate(per_frame):
+                entry: Dict[str, Any] = {}
+                if want_dets:
+                    entry["detections"] = dets
+                if want_ann:
+                    entry["annotated"] = ann
+                outs[i][key] = entry
 
-        return out
+        return outs
@@ -0,0 +1,92 @@
+# backend/scripts/bench_both.py
+"""
+"both" 모드 지연 벤치마크: fire → ppe 순차 실행 vs 모델별 스레드 병렬 실행 (CPU 전용).
+
+사용 (backend 폴더에서):
+    python scripts/bench_both.py                       # uploads/orig 의 이미지 사용
+    python scripts/bench_both.py --image some.jpg --iters 50 --threads 4
+
+출력 형식:
+    sequential  mean <ms>  p50 <ms>  p95 <ms>
+    parallel    mean <ms>  p50 <ms>  p95 <ms>
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+os.environ.setdefault("CUDA_VISIBLE_DEVICES", "")  # CPU 전용 측정
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import cv2  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.utils.vision import YoloService, set_intra_op_threads  # noqa: E402
+
+
+def _pick_image(path: str | None):
+    if path:
+        img = cv2.imread(path)
+    else:
+        cands = sorted(Path(settings.UPLOAD_DIR, "orig").glob("*.jpg"))
+        img = cv2.imread(str(cands[0])) if cands else None
+    if img is None:
+        raise SystemExit("no test image (use --image)")
+    return img
+
+
+def _bench(svc: YoloService, img, iters: int, warmup: int) -> list[float]:
+    for _ in range(warmup):
+        svc.infer(img, kind="both")
+    times = []
+    for _ in range(iters):
+        t0 = time.perf_counter()
+        svc.infer(img, kind="both")
+        times.append((time.perf_counter() - t0) * 1000)
+    return times
+
+
+def _report(name: str, times: list[float]) -> None:
+    times = sorted(times)
+    p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+    print(f"{name:<11} mean {statistics.mean(times):6.1f}ms  "
+          f"p50 {statistics.median(times):6.1f}ms  p95 {p95:6.1f}ms")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--image", default=None)
+    ap.add_argument("--iters", type=int, default=30)
+    ap.add_argument("--warmup", type=int, default=3)
+    ap.add_argument("--threads", type=int, default=os.cpu_count() or 1,
+                    help="프레임당 총 CPU 스레드 예산 (병렬 모드는 모델당 절반)")
+    ap.add_argument("--engine", default=settings.YOLO_ENGINE, help="ultralytics | onnx")
+    args = ap.parse_args()
+
+    img = _pick_image(args.image)
+    common = dict(
+        fire_path=settings.YOLO_FIRE_SMOKE_WEIGHTS,
+        ppe_path=settings.YOLO_PPE_WEIGHTS,
+        fire_labels_json=settings.YOLO_FIRE_SMOKE_LABELS_JSON,
+        ppe_labels_json=settings.YOLO_PPE_LABELS_JSON,
+        default_conf=settings.YOLO_DEFAULT_CONF,
+        engine=args.engine,
+        imgsz=settings.YOLO_IMGSZ,
+        onnx_cache_dir=settings.ONNX_CACHE_DIR,
+    )
+
+    set_intra_op_threads(args.threads)
+    seq = YoloService(**common, parallel_models=False, model_threads=args.threads)
+    _report("sequential", _bench(seq, img, args.iters, args.warmup))
+
+    par = YoloService(**common, parallel_models=True, model_threads=max(1, args.threads // 2))
+    _report("parallel", _bench(par, img, args.iters, args.warmup))
+
+
+if __name__ == "__main__":
+    main()
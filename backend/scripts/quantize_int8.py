@@ -0,0 +1,200 @@
+# backend/scripts/quantize_int8.py
+"""
+INT8 양자화 + 정확도 게이트.
+
+사용 (backend 폴더에서):
+    # 1) uploads/orig 로 캘리브레이션해서 weights/onnx/<stem>_640_int8.onnx 생성
+    python scripts/quantize_int8.py calibrate --model fire --calib uploads/orig
+    python scripts/quantize_int8.py calibrate --model ppe  --calib uploads/orig --limit 300
+
+    # 2) 라벨된 샘플(YOLO txt 포맷)로 FP32 대비 mAP 변화/지연 측정
+    #    --max-drop 초과 시 종료코드 1 → 해당 현장은 INT8 사용 금지
+    python scripts/quantize_int8.py eval --model ppe --images sample/images --labels sample/labels --max-drop 0.01
+
+통과하면 .env 에 YOLO_PPE_PRECISION=int8 (또는 YOLO_FIRE_SMOKE_PRECISION=int8) 설정.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.utils.engines import OnnxEngine, export_onnx, int8_path  # noqa: E402
+from app.utils.quantize import iter_images, quantize_int8  # noqa: E402
+
+WEIGHTS = {"fire": lambda: settings.YOLO_FIRE_SMOKE_WEIGHTS, "ppe": lambda: settings.YOLO_PPE_WEIGHTS}
+IOUV = np.linspace(0.5, 0.95, 10)
+
+
+# --------------------------------------------------------------
+# mAP (COCO 방식: IoU 0.5:0.95, 101-point 보간)
+# --------------------------------------------------------------
+def _box_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    lt = np.maximum(a[:, None, :2], b[None, :, :2])
+    rb = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    inter = np.clip(rb - lt, 0, None).prod(2)
+    area_a = (a[:, 2:] - a[:, :2]).prod(1)
+    area_b = (b[:, 2:] - b[:, :2]).prod(1)
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+
+def _match(pred_xyxy, pred_cls, gt_xyxy, gt_cls) -> np.ndarray:
+    correct = np.zeros((pred_xyxy.shape[0], IOUV.size), dtype=bool)
+    if not pred_xyxy.shape[0] or not gt_xyxy.shape[0]:
+        return correct
+    iou = _box_iou(gt_xyxy, pred_xyxy)
+    same = gt_cls[:, None] == pred_cls[None, :]
+    for i, t in enumerate(IOUV):
+        g, p = np.nonzero((iou >= t) & same)
+        if not g.size:
+            continue
+        m = np.stack([g, p, iou[g, p]], 1)
+        m = m[m[:, 2].argsort()[::-1]]
+        m = m[np.unique(m[:, 1], return_index=True)[1]]
+        m = m[np.unique(m[:, 0], return_index=True)[1]]
+        correct[m[:, 1].astype(int), i] = True
+    return correct
+
+
+def _ap(recall: np.ndarray, precision: np.ndarray) -> float:
+    mrec = np.concatenate(([0.0], recall, [1.0]))
+    mpre = np.concatenate(([1.0], precision, [0.0]))
+    mpre = np.flip(np.maximum.accumulate(np.flip(mpre)))
+    x = np.linspace(0, 1, 101)
+    return float(np.trapezoid(np.interp(x, mrec, mpre), x))
+
+
+def _map(tp: np.ndarray, conf: np.ndarray, pred_cls: np.ndarray, gt_cls: np.ndarray):
+    order = np.argsort(-conf)
+    tp, pred_cls = tp[order].astype(np.float64), pred_cls[order]
+    aps = []
+    for c in np.unique(gt_cls):
+        m = pred_cls == c
+        n_gt = int((gt_cls == c).sum())
+        if not m.any():
+            aps.append(np.zeros(IOUV.size))
+            continue
+        tpc = tp[m].cumsum(0)
+        fpc = (1 - tp[m]).cumsum(0)
+        recall = tpc / (n_gt + 1e-9)
+        precision = tpc / (tpc + fpc)
+        aps.append([_ap(recall[:, j], precision[:, j]) for j in range(IOUV.size)])
+    aps = np.asarray(aps) if aps else np.zeros((1, IOUV.size))
+    return float(aps[:, 0].mean()), float(aps.mean())
+
+
+def _load_gt(label_path: Path, w: int, h: int):
+    if not label_path.exists():
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.int32)
+    rows = np.loadtxt(label_path, ndmin=2, dtype=np.float32)
+    if rows.size == 0:
+        return np.zeros((0, 4), np.float32), np.zeros(0, np.int32)
+    cls = rows[:, 0].astype(np.int32)
+    cx, cy, bw, bh = rows[:, 1] * w, rows[:, 2] * h, rows[:, 3] * w, rows[:, 4] * h
+    return np.stack([cx - bw / 2, cy - bh / 2, cx + bw / 2, cy + bh / 2], 1), cls
+
+
+def evaluate(engine: OnnxEngine, images: list[Path], labels_dir: Path) -> dict:
+    tps, confs, pcls, gcls, times = [], [], [], [], []
+    for p in images:
+        img = cv2.imread(str(p), cv2.IMREAD_COLOR)
+        if img is None:
+            continue
+        t0 = time.perf_counter()
+        res = engine.predict([img])[0]
+        times.append((time.perf_counter() - t0) * 1000)
+
+        gt_xyxy, gt_cls = _load_gt(labels_dir / f"{p.stem}.txt", img.shape[1], img.shape[0])
+        tps.append(_match(res.xyxy, res.cls, gt_xyxy, gt_cls))
+        confs.append(res.conf)
+        pcls.append(res.cls)
+        gcls.append(gt_cls)
+
+    if not times:
+        raise SystemExit("no readable images")
+    map50, map5095 = _map(np.concatenate(tps), np.concatenate(confs),
+                          np.concatenate(pcls), np.concatenate(gcls))
+    times.sort()
+    return {
+        "mAP50": round(map50, 4),
+        "mAP50-95": round(map5095, 4),
+        "latency_ms_mean": round(statistics.mean(times), 2),
+        "latency_ms_p95": round(times[min(len(times) - 1, int(len(times) * 0.95))], 2),
+        "images": len(times),
+    }
+
+
+# --------------------------------------------------------------
+# CLI
+# --------------------------------------------------------------
+def cmd_calibrate(args) -> int:
+    out = quantize_int8(WEIGHTS[args.model](), args.calib, cache_dir=settings.ONNX_CACHE_DIR,
+                        imgsz=settings.YOLO_IMGSZ, limit=args.limit,
+                        exclude_head=not args.quantize_head)
+    print(out)
+    return 0
+
+
+def cmd_eval(args) -> int:
+    weights = WEIGHTS[args.model]()
+    fp32 = export_onnx(weights, settings.ONNX_CACHE_DIR, settings.YOLO_IMGSZ)
+    q = int8_path(weights, settings.ONNX_CACHE_DIR, settings.YOLO_IMGSZ)
+    if not Path(q).exists():
+        print(f"INT8 model not found: {q} (run calibrate first)", file=sys.stderr)
+        return 2
+
+    images = list(iter_images(args.images, args.limit))
+    # mAP 계산용: 낮은 conf로 모든 후보를 남긴다
+    kw = dict(imgsz=settings.YOLO_IMGSZ, threads=args.threads, conf=0.001)
+    r32 = evaluate(OnnxEngine(fp32, **kw), images, Path(args.labels))
+    r8 = evaluate(OnnxEngine(q, **kw), images, Path(args.labels))
+
+    drop = r32["mAP50-95"] - r8["mAP50-95"]
+    report = {
+        "model": args.model,
+        "fp32": r32,
+        "int8": r8,
+        "mAP50-95_drop": round(drop, 4),
+        "speedup": round(r32["latency_ms_mean"] / max(r8["latency_ms_mean"], 1e-6), 2),
+        "max_drop": args.max_drop,
+        "pass": drop <= args.max_drop,
+    }
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if report["pass"] else 1
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="YOLO INT8 quantization / accuracy gate")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    c = sub.add_parser("calibrate", help="INT8 ONNX 생성")
+    c.add_argument("--model", choices=WEIGHTS.keys(), required=True)
+    c.add_argument("--calib", default=str(Path(settings.UPLOAD_DIR) / "orig"), help="대표 프레임 폴더")
+    c.add_argument("--limit", type=int, default=200)
+    c.add_argument("--quantize-head", action="store_true", help="Detect head까지 INT8로 (정확도↓)")
+    c.set_defaults(func=cmd_calibrate)
+
+    e = sub.add_parser("eval", help="FP32 대비 mAP 변화/지연 리포트")
+    e.add_argument("--model", choices=WEIGHTS.keys(), required=True)
+    e.add_argument("--images", required=True)
+    e.add_argument("--labels", required=True, help="YOLO txt 라벨 폴더 (<stem>.txt)")
+    e.add_argument("--limit", type=int, default=0)
+    e.add_argument("--threads", type=int, default=0)
+    e.add_argument("--max-drop", type=float, default=0.01, help="허용 mAP50-95 하락폭")
+    e.set_defaults(func=cmd_eval)
+
+    args = ap.parse_args()
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,71 @@
+# backend/tests/test_gate_tracking.py
+"""
+장면 게이트 + 추적기 조합: 움직이지 않는 위험물도 기본 설정에서 확정 트랙 → 알림까지 가야 한다.
+_pull_loop의 프레임 방침(infer / track / gate)을 그대로 따라 빈 장면 10초 → 위험물 등장 후 60초(10fps).
+"""
+import numpy as np
+
+from app.core.config import settings
+from app.utils import gating
+from app.utils.gating import SceneGate
+from app.utils.tracking import Tracker
+
+FPS = settings.CAMERA_MAX_FPS
+HAZARD = {"label": "fire", "conf": 0.45, "bbox": [100.0, 100.0, 180.0, 200.0]}
+
+
+def _tracker() -> Tracker:
+    return Tracker(
+        detect_every=settings.TRACK_DETECT_EVERY,
+        iou_thr=settings.TRACK_IOU,
+        high_conf=settings.TRACK_HIGH_CONF,
+        max_age=settings.TRACK_MAX_AGE,
+        min_hits=settings.TRACK_MIN_HITS,
+        min_confidence=settings.TRACK_MIN_CONFIDENCE,
+        new_track_conf=settings.TRACK_NEW_CONF,
+    )
+
+
+def test_static_hazard_gets_confirmed(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(gating.time, "monotonic", lambda: clock[0])
+
+    gate = SceneGate(
+        width=settings.GATE_WIDTH,
+        pixel_diff=settings.GATE_PIXEL_DIFF,
+        change_ratio=settings.GATE_CHANGE_RATIO,
+        refresh_sec=settings.GATE_REFRESH_SEC,
+    )
+    tracker = _tracker()
+    empty = np.full((240, 320, 3), 80, dtype=np.uint8)
+    hazard = empty.copy()
+    x1, y1, x2, y2 = map(int, HAZARD["bbox"])
+    hazard[y1:y2, x1:x2] = (0, 0, 255)   # 등장 후 움직이지 않음
+
+    last = None
+    alerts = 0
+    for i in range(int(70 * FPS)):
+        present = i >= 10 * FPS
+        frame = hazard if present else empty
+        if last is None:
+            policy = "infer"
+        elif not tracker.need_detect():
+            policy = "track"
+        else:
+            policy = "gate"
+
+        fresh = policy == "infer" or (policy == "gate" and gate.should_infer(frame))
+        if fresh:
+            dets = tracker.update([dict(HAZARD)] if present else [], frame.shape)
+            gate.mark_analyzed()
+            if present and any(d["confirmed"] for d in dets):
+                alerts += 1
+        elif policy == "track":
+            dets = tracker.predict()
+        else:
+            dets = tracker.hold()
+        last = dets
+        clock[0] += 1.0 / FPS
+
+    assert alerts > 0
+    assert gate.skipped > 0   # 게이트가 실제로 프레임을 건너뛰었는데도 확정됨